@@ -0,0 +1,138 @@
+import hashlib
+import heapq
+import math
+import os
+
+import numpy as np
+
+# 节点数不超过该值时，初始化阶段自动构建全源最短路表（n² 的内存开销）
+AUTO_BUILD_LIMIT = 2000
+
+
+def file_digest(*paths) -> str:
+    """数据文件内容的 SHA-1 摘要，用作缓存键"""
+    sha = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+class AllPairsTable:
+    """
+    全源最短路距离矩阵 + 下一跳矩阵。
+    next_hop[i, j] 为从 i 到 j 的最短路上的第一个节点下标（不可达为 -1），
+    因此路径重建的代价只与路径长度成正比。
+    """
+
+    def __init__(self, node_ids, dist, next_hop):
+        self.node_ids = [int(node_id) for node_id in node_ids]
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.dist = dist
+        self.next_hop = next_hop
+
+    @classmethod
+    def build(cls, graph):
+        """对每个源点运行一次 Dijkstra"""
+        node_ids = list(graph.keys())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        for neighbors in graph.values():
+            for v in neighbors:
+                if v not in index:
+                    index[v] = len(node_ids)
+                    node_ids.append(v)
+        n = len(node_ids)
+        adjacency = [[(index[v], w) for v, w in graph.get(node_id, {}).items()]
+                     for node_id in node_ids]
+
+        dist = np.full((n, n), np.inf, dtype=np.float32)
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+        for source in range(n):
+            best = {source: 0.0}
+            first = {source: source}
+            closed = set()
+            heap = [(0.0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if u in closed:
+                    continue
+                closed.add(u)
+                dist[source, u] = d
+                next_hop[source, u] = first[u]
+                for v, w in adjacency[u]:
+                    nd = d + w
+                    if nd < best.get(v, math.inf):
+                        best[v] = nd
+                        # 第一跳：从源点出发直接相连的节点就是自己，否则继承前驱的第一跳
+                        first[v] = v if u == source else first[u]
+                        heapq.heappush(heap, (nd, v))
+        return cls(node_ids, dist, next_hop)
+
+    def distance(self, start, goal) -> float:
+        i, j = self.index.get(start), self.index.get(goal)
+        if i is None or j is None:
+            return math.inf
+        return float(self.dist[i, j])
+
+    def path(self, start, goal) -> list:
+        """按下一跳矩阵重建路径；不可达时抛出 ValueError"""
+        i, j = self.index.get(start), self.index.get(goal)
+        if i is None or j is None or self.next_hop[i, j] < 0:
+            raise ValueError(f"从节点 {start} 无法到达节点 {goal}")
+        path = [start]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            path.append(self.node_ids[i])
+        return path
+
+    def save(self, filename: str, digest: str):
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        # 先写临时文件再替换，避免中途退出留下损坏的缓存
+        tmp = filename + '.tmp.npz'
+        np.savez_compressed(tmp, node_ids=np.asarray(self.node_ids, dtype=np.int64),
+                            dist=self.dist, next_hop=self.next_hop,
+                            digest=np.asarray(digest))
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename: str, digest: str):
+        """摘要匹配时返回缓存的表，否则返回 None"""
+        if not os.path.exists(filename):
+            return None
+        try:
+            with np.load(filename) as data:
+                if str(data['digest']) != digest:
+                    return None
+                return cls(data['node_ids'], data['dist'], data['next_hop'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"全源最短路缓存读取失败，将重新构建：{e}")
+            return None
+
+
+def cache_filename(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"all_pairs_{digest[:16]}.npz")
+
+
+def load_or_build(graph, node_file: str, edge_file: str, cache_dir: str = None,
+                  build: bool = True, digest: str = None):
+    """
+    读取与数据文件摘要匹配的缓存表；没有时按需构建并写入缓存。
+    :param cache_dir: 缓存目录，默认是数据文件旁的 cache/ 目录
+    :param build: 缓存缺失时是否构建
+    :param digest: 已知的数据文件摘要（例如来自 graph_cache），省去重新计算
+    """
+    digest = digest or file_digest(node_file, edge_file)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(edge_file)), 'cache')
+    filename = cache_filename(cache_dir, digest)
+    table = AllPairsTable.load(filename, digest)
+    if table is not None or not build:
+        return table
+
+    table = AllPairsTable.build(graph)
+    try:
+        table.save(filename, digest)
+    except OSError as e:
+        print(f"全源最短路缓存写入失败：{e}")
+    return table
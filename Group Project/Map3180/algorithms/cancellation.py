@@ -0,0 +1,27 @@
+import threading
+
+
+class CalculationCancelled(Exception):
+    """计算被取消（请求已被新的请求取代，或用户重置了选择）"""
+
+
+class CancelToken:
+    """
+    协作式取消标记：由发起方调用 cancel()，训练/迭代循环每轮调用 check()。
+    可以跨线程使用。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """已取消时抛出 CalculationCancelled"""
+        if self._event.is_set():
+            raise CalculationCancelled()
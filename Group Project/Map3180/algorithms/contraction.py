@@ -0,0 +1,170 @@
+class ContractedGraph:
+    """
+    图收缩预处理（在 read_edge_data 之后）：
+    1. 反复剪掉度为 1 的“断头支路”（keep 中的节点除外），记录每个被剪节点通往主干的父节点；
+    2. 把度为 2 的途经节点串成的链收缩成一条带权捷径边，并记住展开后的节点序列。
+    收缩后的图保持剩余节点间的最短距离不变；查询时起终点若落在被剪支路或链中间，
+    会临时接入收缩图，求得的路径再展开回完整节点列表用于绘制。
+    """
+
+    def __init__(self, graph, keep=()):
+        self.keep = set(keep)
+        self.spur_parent = {}  # 被剪节点 -> 通往主干的相邻节点（孤立节点为 None）
+        self.chains = []  # 每条链 [a, x1, ..., xk, b]
+        self.chain_of = {}  # 链内部节点 -> (链下标, 在链中的位置)
+        self.expansions = {}  # 捷径边 (u, v) -> [u, ..., v]
+        self._source = graph
+        self.graph = self._contract(graph)
+
+    # -------------------- 预处理 --------------------
+    def _contract(self, graph):
+        neighbors = {u: set(vs) for u, vs in graph.items()}
+        for u, vs in graph.items():
+            for v in vs:
+                neighbors.setdefault(v, set()).add(u)
+
+        # 1. 剪除断头支路
+        stack = [u for u, vs in neighbors.items() if len(vs) <= 1 and u not in self.keep]
+        while stack:
+            u = stack.pop()
+            if u not in neighbors or len(neighbors[u]) > 1 or u in self.keep:
+                continue
+            parent = next(iter(neighbors[u]), None)
+            self.spur_parent[u] = parent
+            del neighbors[u]
+            if parent is not None:
+                neighbors[parent].discard(u)
+                if len(neighbors[parent]) <= 1 and parent not in self.keep:
+                    stack.append(parent)
+
+        # 2. 收缩度为 2 的链
+        def interior(x):
+            return len(neighbors[x]) == 2 and x not in self.keep
+
+        contracted = {u: {} for u in neighbors}
+        for u in neighbors:
+            if interior(u):
+                continue
+            for v in neighbors[u]:
+                if not interior(v) and v in graph.get(u, {}):
+                    contracted[u][v] = graph[u][v]
+
+        for x in neighbors:
+            if not interior(x) or x in self.chain_of:
+                continue
+            chain = self._walk_chain(x, neighbors, interior)
+            chain_id = len(self.chains)
+            self.chains.append(chain)
+            for pos, node in enumerate(chain[1:-1], start=1):
+                self.chain_of[node] = (chain_id, pos)
+                del contracted[node]
+
+            a, b = chain[0], chain[-1]
+            if a == b:
+                continue  # 回到同一节点的环，不会出现在最短路中
+            self._add_shortcut(contracted, chain)
+            self._add_shortcut(contracted, chain[::-1])
+        return contracted
+
+    def _walk_chain(self, x, neighbors, interior):
+        """从内部节点 x 向两侧延伸到链的端点，返回 [a, ..., x, ..., b]"""
+        sides = []
+        for first in neighbors[x]:
+            side = []
+            prev, cur = x, first
+            while interior(cur) and cur != x:
+                side.append(cur)
+                prev, cur = cur, next(v for v in neighbors[cur] if v != prev)
+            if cur == x:
+                # 整个连通分量是一个纯环：把 x 自身提升为端点
+                self.keep.add(x)
+                return [x] + side + [x]
+            side.append(cur)
+            sides.append(side)
+        left, right = sides
+        return left[::-1] + [x] + right
+
+    def _add_shortcut(self, contracted, chain):
+        a, b = chain[0], chain[-1]
+        weight = self.sequence_weight(chain)
+        if weight < contracted[a].get(b, float('inf')):
+            contracted[a][b] = weight
+            self.expansions[(a, b)] = list(chain)
+
+    def sequence_weight(self, sequence) -> float:
+        return sum(self._source[u][v] for u, v in zip(sequence, sequence[1:]))
+
+    # -------------------- 查询 --------------------
+    def _climb(self, node):
+        """沿被剪支路向主干爬升：[node, ..., 主干或链上的节点]"""
+        path = [node]
+        while path[-1] in self.spur_parent:
+            parent = self.spur_parent[path[-1]]
+            if parent is None:
+                break
+            path.append(parent)
+        return path
+
+    def _anchors(self, node):
+        """链内部节点到两个链端点的 [(端点, 节点->端点序列)]"""
+        chain_id, pos = self.chain_of[node]
+        chain = self.chains[chain_id]
+        return [(chain[0], chain[pos::-1]), (chain[-1], chain[pos:])]
+
+    def prepare_query(self, start, goal):
+        """
+        为一次查询准备收缩图。
+        :return: (graph, start', goal', expand)；若起终点位于同一支路树上，
+            graph 为 None，expand() 直接返回完整路径
+        """
+        up = self._climb(start)
+        down = self._climb(goal)
+        down_pos = {node: i for i, node in enumerate(down)}
+        for i, node in enumerate(up):
+            if node in down_pos:
+                path = up[:i + 1] + down[:down_pos[node]][::-1]
+                return None, start, goal, lambda _: path
+
+        s, t = up[-1], down[-1]
+        graph = self.graph
+        local = {}  # 本次查询临时接入的边 -> 展开序列
+        if s in self.chain_of or t in self.chain_of:
+            graph = dict(graph)
+        if s in self.chain_of:
+            graph[s] = {}
+            for end, seq in self._anchors(s):
+                weight = self.sequence_weight(seq)
+                # 挂在同一节点上的环两个端点相同，取较短的一侧
+                if weight < graph[s].get(end, float('inf')):
+                    graph[s][end] = weight
+                    local[(s, end)] = seq
+        if t in self.chain_of:
+            graph.setdefault(t, {})
+            for end, seq in self._anchors(t):
+                seq = seq[::-1]
+                weight = self.sequence_weight(seq)
+                graph[end] = dict(graph.get(end, {}))
+                if weight < graph[end].get(t, float('inf')):
+                    graph[end][t] = weight
+                    local[(end, t)] = seq
+            if s in self.chain_of and self.chain_of[s][0] == self.chain_of[t][0]:
+                # 起终点在同一条链上：沿链直达也是候选
+                chain = self.chains[self.chain_of[s][0]]
+                i, j = self.chain_of[s][1], self.chain_of[t][1]
+                seq = chain[i:j + 1] if i <= j else chain[j:i + 1][::-1]
+                weight = self.sequence_weight(seq)
+                if weight < graph[s].get(t, float('inf')):
+                    graph[s][t] = weight
+                    local[(s, t)] = seq
+
+        def expand(path_ids):
+            full = up[:-1]
+            for u, v in zip(path_ids, path_ids[1:]):
+                seq = local.get((u, v)) or self.expansions.get((u, v)) or [u, v]
+                full.extend(seq[:-1])
+            full.append(path_ids[-1])
+            if path_ids[-1] == t:
+                full.extend(down[:-1][::-1])
+            return full
+
+        return graph, s, t, expand
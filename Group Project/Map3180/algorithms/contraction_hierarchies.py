@@ -0,0 +1,267 @@
+import heapq
+import math
+import os
+
+import numpy as np
+
+from .all_pairs import file_digest
+
+# 见证搜索（witness search）最多结算的节点数；超过则保守地添加捷径
+WITNESS_SETTLE_LIMIT = 60
+
+
+class CHIndex:
+    """
+    收缩层次（Contraction Hierarchies）索引，面向 1000 节点以上的地图。
+
+    预处理：按“边差 + 已收缩邻居数”的优先级逐个收缩节点，若 u->v->w 是 u 到 w 的唯一
+    最短路（见证搜索找不到更短的绕行），就添加捷径 u->w 并记住中间节点 v。
+    查询：从起点沿“向上”（rank 增大）的边、从终点沿反向的“向上”边做双向 Dijkstra，
+    相遇后把捷径递归展开成完整的节点路径。
+
+    索引基于构建时的边权。惩罚区域（暴雨/车祸）会改变边权，而被见证搜索省略的捷径
+    在新边权下可能变得必要，因此存在惩罚时 PathService 会退回到在实时图上运行 A*，
+    清除惩罚后重新使用索引；边权长期变化时应以新图重新构建。
+    """
+
+    def __init__(self, node_ids, rank, src, dst, weight, mid):
+        self.node_ids = [int(node_id) for node_id in node_ids]
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.rank = np.asarray(rank, dtype=np.int32)
+        self._arrays = (np.asarray(src, dtype=np.int32), np.asarray(dst, dtype=np.int32),
+                        np.asarray(weight, dtype=np.float64), np.asarray(mid, dtype=np.int32))
+
+        n = len(self.node_ids)
+        rank = self.rank.tolist()
+        self._up = [[] for _ in range(n)]  # 正向搜索：u -> v，rank[v] > rank[u]
+        self._down = [[] for _ in range(n)]  # 反向搜索：在 v 处松弛 u -> v，rank[u] > rank[v]
+        self._mid = {}
+        for u, v, w, m in zip(*(a.tolist() for a in self._arrays)):
+            if rank[v] > rank[u]:
+                self._up[u].append((v, w))
+            else:
+                self._down[v].append((u, w))
+            self._mid[(u, v)] = m
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int((self._arrays[3] >= 0).sum())
+
+    # -------------------- 预处理 --------------------
+    @classmethod
+    def build(cls, graph, witness_limit=WITNESS_SETTLE_LIMIT):
+        node_ids = list(graph.keys())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        for neighbors in graph.values():
+            for v in neighbors:
+                if v not in index:
+                    index[v] = len(node_ids)
+                    node_ids.append(v)
+        n = len(node_ids)
+
+        out = [{} for _ in range(n)]  # u -> {v: (w, mid)}
+        inn = [{} for _ in range(n)]  # v -> {u: (w, mid)}
+        for u_id, neighbors in graph.items():
+            u = index[u_id]
+            for v_id, w in neighbors.items():
+                v = index[v_id]
+                if u != v and w < out[u].get(v, (math.inf,))[0]:
+                    out[u][v] = (w, -1)
+                    inn[v][u] = (w, -1)
+
+        contracted = [False] * n
+        deleted_neighbors = [0] * n
+
+        def witness_search(source, skip, limit, targets):
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            remaining = set(targets)
+            while heap and remaining and settled < witness_limit:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > limit:
+                    break
+                settled += 1
+                remaining.discard(u)
+                for v, (w, _) in out[u].items():
+                    if v == skip or contracted[v]:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(v, math.inf):
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+            return dist
+
+        def shortcuts_for(v):
+            ins = [(u, w) for u, (w, _) in inn[v].items() if not contracted[u]]
+            outs = [(x, w) for x, (w, _) in out[v].items() if not contracted[x]]
+            shortcuts = []
+            for u, wu in ins:
+                targets = {x: wu + wx for x, wx in outs if x != u}
+                if not targets:
+                    continue
+                dist = witness_search(u, v, max(targets.values()), targets)
+                for x, d in targets.items():
+                    if dist.get(x, math.inf) > d:
+                        shortcuts.append((u, x, d))
+            return shortcuts, len(ins) + len(outs)
+
+        def priority(v):
+            shortcuts, removed = shortcuts_for(v)
+            return len(shortcuts) - removed + deleted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = [0] * n
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # 惰性更新：优先级变差时放回堆中
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            shortcuts, _ = shortcuts_for(v)
+            for u, x, d in shortcuts:
+                if d < out[u].get(x, (math.inf,))[0]:
+                    out[u][x] = (d, v)
+                    inn[x][u] = (d, v)
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for u in set(inn[v]) | set(out[v]):
+                if not contracted[u]:
+                    deleted_neighbors[u] += 1
+
+        src, dst, weight, mid = [], [], [], []
+        for u in range(n):
+            for v, (w, m) in out[u].items():
+                src.append(u)
+                dst.append(v)
+                weight.append(w)
+                mid.append(m)
+        return cls(node_ids, rank, src, dst, weight, mid)
+
+    # -------------------- 查询 --------------------
+    def query(self, start, goal):
+        """
+        双向 CH 查询
+        :return: (距离, 完整节点 ID 路径)；不可达时抛出 ValueError
+        """
+        s, t = self.index.get(start), self.index.get(goal)
+        if s is None or t is None:
+            raise ValueError(f"从节点 {start} 无法到达节点 {goal}")
+        if s == t:
+            return 0.0, [start]
+
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({}, {})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        graphs = (self._up, self._down)
+        best, meet = math.inf, None
+        while heaps[0] or heaps[1]:
+            keys = [h[0][0] if h else math.inf for h in heaps]
+            if min(keys) >= best:
+                break
+            side = 0 if keys[0] <= keys[1] else 1
+            d, u = heapq.heappop(heaps[side])
+            if d > dist[side][u]:
+                continue
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+            for v, w in graphs[side][u]:
+                nd = d + w
+                if nd < dist[side].get(v, math.inf):
+                    dist[side][v] = nd
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+
+        if meet is None:
+            raise ValueError(f"从节点 {start} 无法到达节点 {goal}")
+
+        forward = [meet]
+        while forward[-1] != s:
+            forward.append(parent[0][forward[-1]])
+        forward.reverse()
+        backward = [meet]
+        while backward[-1] != t:
+            backward.append(parent[1][backward[-1]])
+        hops = forward + backward[1:]
+
+        path = [hops[0]]
+        for u, v in zip(hops, hops[1:]):
+            path.extend(self._unpack(u, v)[1:])
+        return best, [self.node_ids[i] for i in path]
+
+    def path(self, start, goal) -> list:
+        return self.query(start, goal)[1]
+
+    def _unpack(self, u, v):
+        """把捷径 u -> v 递归展开为原图节点下标序列"""
+        result = [u]
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            m = self._mid[(a, b)]
+            if m < 0:
+                result.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+        return result
+
+    # -------------------- 持久化 --------------------
+    def save(self, filename: str, digest: str):
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        tmp = filename + '.tmp.npz'
+        src, dst, weight, mid = self._arrays
+        np.savez_compressed(tmp, node_ids=np.asarray(self.node_ids, dtype=np.int64),
+                            rank=self.rank, src=src, dst=dst, weight=weight, mid=mid,
+                            digest=np.asarray(digest))
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename: str, digest: str):
+        """摘要匹配时返回缓存的索引，否则返回 None"""
+        if not os.path.exists(filename):
+            return None
+        try:
+            with np.load(filename) as data:
+                if str(data['digest']) != digest:
+                    return None
+                return cls(data['node_ids'], data['rank'], data['src'], data['dst'],
+                           data['weight'], data['mid'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"CH 索引缓存读取失败，将重新构建：{e}")
+            return None
+
+
+def load_or_build(graph, node_file: str = None, edge_file: str = None, cache_dir: str = None,
+                  digest: str = None):
+    """
+    读取与数据文件摘要匹配的 CH 索引缓存，没有时构建并写入缓存（跨会话复用）。
+    未提供数据文件路径时只在内存中构建。
+    :param digest: 已知的数据文件摘要，省去重新计算
+    """
+    if node_file is None or edge_file is None:
+        return CHIndex.build(graph)
+
+    digest = digest or file_digest(node_file, edge_file)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(edge_file)), 'cache')
+    filename = os.path.join(cache_dir, f"ch_{digest[:16]}.npz")
+    index = CHIndex.load(filename, digest)
+    if index is not None:
+        return index
+
+    index = CHIndex.build(graph)
+    try:
+        index.save(filename, digest)
+    except OSError as e:
+        print(f"CH 索引缓存写入失败：{e}")
+    return index
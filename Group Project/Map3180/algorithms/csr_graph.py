@@ -0,0 +1,156 @@
+import numpy as np
+
+
+class CSRGraph:
+    """
+    把 {start: {end: distance}} 邻接表压缩成 CSR（压缩稀疏行）数组。
+    节点 ID 映射为 0..n-1 的连续下标，第 i 个节点的出边位于 indptr[i]:indptr[i+1]，
+    邻居顺序与原字典的插入顺序一致，因此 argmax 的平局处理与 dict 版完全相同。
+    """
+
+    def __init__(self, graph):
+        node_ids = list(graph.keys())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self._num_keys = len(node_ids)
+        # 只作为终点出现的节点也要分配下标（出度为 0）
+        for neighbors in graph.values():
+            for v in neighbors:
+                if v not in index:
+                    index[v] = len(node_ids)
+                    node_ids.append(v)
+
+        indptr = [0]
+        indices = []
+        weights = []
+        for node_id in node_ids:
+            neighbors = graph.get(node_id, {})
+            for v, w in neighbors.items():
+                indices.append(index[v])
+                weights.append(w)
+            indptr.append(len(indices))
+
+        self.node_ids = node_ids
+        self.index = index
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self._padded_slots = None
+
+    @classmethod
+    def from_arrays(cls, node_ids, indptr, indices, weights, num_keys=None):
+        """
+        直接由 CSR 数组构造（例如 graph_cache 中内存映射的数组），不经过字典。
+        :param num_keys: 原字典的键数，即前 num_keys 个节点；默认全部节点
+        """
+        csr = cls.__new__(cls)
+        csr.node_ids = list(node_ids)
+        csr.index = {node_id: i for i, node_id in enumerate(csr.node_ids)}
+        csr._num_keys = len(csr.node_ids) if num_keys is None else num_keys
+        csr.indptr = indptr
+        csr.indices = indices
+        csr.weights = weights
+        csr._padded_slots = None
+        return csr
+
+    def with_weights(self, weights):
+        """结构相同、边权不同的 CSR 图（共享节点、邻接数组）"""
+        csr = CSRGraph.__new__(CSRGraph)
+        csr.__dict__.update(self.__dict__)
+        csr.weights = weights
+        return csr
+
+    def edge_slot(self, u, v) -> int:
+        """边 (u, v) 在扁平数组中的偏移，不存在时返回 -1"""
+        i = self.index.get(u)
+        j = self.index.get(v)
+        if i is None or j is None:
+            return -1
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        hits = np.flatnonzero(self.indices[lo:hi] == j)
+        return int(lo + hits[0]) if len(hits) else -1
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def padded_slots(self):
+        """
+        (num_nodes, max_degree) 的边偏移表，不足的位置填 -1。
+        用于批量（向量化）地取出多个状态的整行 Q 值。
+        """
+        if self._padded_slots is None:
+            degrees = self.degrees
+            width = int(degrees.max()) if self.num_nodes else 0
+            cols = np.arange(width, dtype=np.int64)
+            slots = self.indptr[:-1, None] + cols[None, :]
+            slots[cols[None, :] >= degrees[:, None]] = -1
+            self._padded_slots = slots
+        return self._padded_slots
+
+    def zeros_q(self):
+        """与边一一对应的扁平 Q 数组"""
+        return np.zeros(self.num_edges, dtype=np.float64)
+
+    def q_to_dict(self, Q):
+        """转换为 q_learning.extract_path 使用的 {state: {action: q}} 格式"""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        values = np.asarray(Q, dtype=np.float64).tolist()
+        node_ids = self.node_ids
+        table = {}
+        for i in range(self._num_keys):
+            lo, hi = indptr[i], indptr[i + 1]
+            table[node_ids[i]] = {node_ids[indices[k]]: values[k] for k in range(lo, hi)}
+        return table
+
+    def q_from_dict(self, table):
+        """把 dict 格式的 Q 表按 CSR 顺序展开，缺失项记为 0"""
+        Q = self.zeros_q()
+        indptr = self.indptr
+        for state, actions in table.items():
+            i = self.index.get(state)
+            if i is None:
+                continue
+            for k in range(indptr[i], indptr[i + 1]):
+                Q[k] = actions.get(self.node_ids[self.indices[k]], 0.0)
+        return Q
+
+    def greedy_policy(self, Q):
+        """每个有出边的状态的贪婪动作 {state: next_state}"""
+        Q = np.asarray(Q, dtype=np.float64)
+        policy = {}
+        for i, node_id in enumerate(self.node_ids):
+            lo, hi = self.indptr[i], self.indptr[i + 1]
+            if lo < hi:
+                policy[node_id] = self.node_ids[self.indices[lo + int(np.argmax(Q[lo:hi]))]]
+        return policy
+
+    def extract_path(self, Q, start, goal, verbose=True):
+        """与 q_learning.extract_path 语义一致的贪婪路径提取（基于扁平 Q 数组）"""
+        state = start
+        path = [state]
+        visited = set()
+        while state != goal:
+            visited.add(state)
+            i = self.index.get(state)
+            if i is None or self.indptr[i] == self.indptr[i + 1]:
+                if verbose:
+                    print(f"在节点 {state} 停止：没有可选动作。")
+                return path
+            lo, hi = self.indptr[i], self.indptr[i + 1]
+            action = self.node_ids[self.indices[lo + int(np.argmax(Q[lo:hi]))]]
+            if action in visited:
+                if verbose:
+                    print(f"检测到循环路径，停在 {action}")
+                return path
+            path.append(action)
+            state = action
+        return path
@@ -0,0 +1,202 @@
+"""
+编译后的二进制图缓存：把节点坐标、CSR 邻接和边权写进单个可内存映射的文件，
+启动时 mmap 读取，避免逐行解析文本数据文件。
+
+文件布局：
+    8 字节魔数 | 4 字节头长度 | JSON 头（内容摘要、源文件大小/修改时间、各数组的 dtype/形状/偏移）
+    | 按 64 字节对齐的原始数组数据
+源文件的大小和修改时间都没变时直接使用缓存；否则重新计算内容摘要，摘要也不同才重新解析并编译。
+
+预编译：python -m algorithms.graph_cache data/node_py_data.txt data/edge_py_data.txt
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from . import bulk_loader
+from .all_pairs import file_digest
+from .csr_graph import CSRGraph
+from .q_learning import DISTANCE_SCALE
+
+MAGIC = b"MAPCSR01"
+ALIGNMENT = 64
+HEADER_SLACK = 256  # 头部预留的额外字节
+
+
+class CompiledGraph:
+    """
+    节点表 + CSR 邻接。nodes 的顺序与 read_node_data 一致，CSR 的节点和邻居顺序与
+    read_edge_data 生成的字典一致，因此还原出的 nodes / graph 字典与文本解析结果完全相同。
+    """
+
+    ARRAYS = ("node_ids", "coords", "csr_ids", "indptr", "indices", "weights")
+
+    def __init__(self, node_ids, coords, csr_ids, indptr, indices, weights, num_keys, digest):
+        self.node_ids = node_ids  # read_node_data 中的节点 ID
+        self.coords = coords  # (n, 2) 坐标
+        self.csr_ids = csr_ids  # CSR 下标 -> 节点 ID
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.num_keys = num_keys  # graph 字典的键数（只作为终点出现的节点排在后面）
+        self.digest = digest
+
+    @classmethod
+    def from_text(cls, node_file: str, edge_file: str, digest: str = None):
+        """批量解析文本文件，直接得到 CSR 数组（不构建中间字典）"""
+        node_report = bulk_loader.LoadReport(node_file)
+        node_ids, coords = bulk_loader.load_nodes(node_file, node_report)
+        node_report.print_summary()
+        edge_report = bulk_loader.LoadReport(edge_file)
+        edges = bulk_loader.load_edges(edge_file, node_ids, coords, DISTANCE_SCALE, edge_report)
+        edge_report.print_summary()
+        csr_ids, indptr, indices, weights = bulk_loader.build_csr(*edges)
+        return cls(node_ids, coords, csr_ids, indptr, indices, weights, len(csr_ids),
+                   digest or file_digest(node_file, edge_file))
+
+    def nodes_dict(self) -> dict:
+        return dict(zip(self.node_ids.tolist(), map(tuple, self.coords.tolist())))
+
+    def graph_dict(self) -> dict:
+        ids = self.csr_ids.tolist()
+        targets = self.csr_ids[self.indices].tolist()
+        weights = self.weights.tolist()
+        indptr = self.indptr.tolist()
+        return {ids[i]: dict(zip(targets[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                for i in range(self.num_keys)}
+
+    def csr(self) -> CSRGraph:
+        return CSRGraph.from_arrays(self.csr_ids.tolist(), self.indptr, self.indices,
+                                    self.weights, self.num_keys)
+
+    # -------------------- 持久化 --------------------
+    def save(self, filename: str, sources: dict):
+        """:param sources: 源文件 -> [大小, 修改时间(ns)]，用于快速判断缓存是否新鲜"""
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in self.ARRAYS}
+        layout = {}
+        header = {
+            "digest": self.digest,
+            "num_keys": self.num_keys,
+            "sources": sources,
+            "arrays": layout,
+        }
+        # 头部长度取决于偏移：先按最长的占位偏移估算，并留出余量以便原地更新 sources
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": 1 << 62}
+        reserved = len(MAGIC) + 4 + len(json.dumps(header)) + HEADER_SLACK
+        reserved = -(-reserved // ALIGNMENT) * ALIGNMENT
+        offset = reserved
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        blob = json.dumps(header).encode("utf-8")
+        if len(MAGIC) + 4 + len(blob) > reserved:
+            raise ValueError("图缓存头部超出预留空间")
+
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+            for name, array in arrays.items():
+                f.seek(layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(offset)
+        os.replace(tmp, filename)
+
+    @staticmethod
+    def read_header(filename: str):
+        """读取缓存文件头，格式不符时返回 None"""
+        try:
+            with open(filename, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                (length,) = struct.unpack("<I", f.read(4))
+                return json.loads(f.read(length).decode("utf-8"))
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @classmethod
+    def load(cls, filename: str, header: dict):
+        """以只读内存映射方式打开各数组"""
+        arrays = {}
+        for name in cls.ARRAYS:
+            spec = header["arrays"][name]
+            shape = tuple(spec["shape"])
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=spec["dtype"])
+            else:
+                arrays[name] = np.memmap(filename, dtype=spec["dtype"], mode="r",
+                                         offset=spec["offset"], shape=shape)
+        return cls(num_keys=header["num_keys"], digest=header["digest"], **arrays)
+
+
+def _source_stats(*paths) -> dict:
+    stats = {}
+    for path in paths:
+        st = os.stat(path)
+        stats[os.path.abspath(path)] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def cache_filename(cache_dir: str, edge_file: str) -> str:
+    key = hashlib.sha1(os.path.abspath(edge_file).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"graph_{key}.bin")
+
+
+def load_or_build(node_file: str, edge_file: str, cache_dir: str = None) -> CompiledGraph:
+    """
+    读取新鲜的二进制图缓存；缓存缺失或过期时解析文本文件并重新编译。
+    :param cache_dir: 缓存目录，默认是数据文件旁的 cache/ 目录
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(edge_file)), "cache")
+    filename = cache_filename(cache_dir, edge_file)
+    sources = _source_stats(node_file, edge_file)
+    header = CompiledGraph.read_header(filename)
+
+    digest = None
+    if header is not None:
+        try:
+            if header["sources"] == sources:
+                return CompiledGraph.load(filename, header)
+            # 修改时间变了但内容可能没变（例如重新检出），按内容摘要判断
+            digest = file_digest(node_file, edge_file)
+            if header["digest"] == digest:
+                compiled = CompiledGraph.load(filename, header)
+                _refresh_sources(filename, header, sources)
+                return compiled
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            print(f"图缓存读取失败，将重新编译：{e}")
+
+    compiled = CompiledGraph.from_text(node_file, edge_file, digest)
+    try:
+        compiled.save(filename, sources)
+    except (OSError, ValueError) as e:
+        print(f"图缓存写入失败：{e}")
+    return compiled
+
+
+def _refresh_sources(filename, header, sources):
+    """内容未变，只更新头部记录的源文件大小/修改时间（头部长度不变时原地改写）"""
+    blob = json.dumps(dict(header, sources=sources)).encode("utf-8")
+    first = min(spec["offset"] for spec in header["arrays"].values())
+    if len(MAGIC) + 4 + len(blob) > first:
+        return
+    try:
+        with open(filename, "r+b") as f:
+            f.seek(len(MAGIC))
+            f.write(struct.pack("<I", len(blob)) + blob)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("用法：python -m algorithms.graph_cache <节点文件> <边文件> [缓存目录]")
+        sys.exit(2)
+    compiled = load_or_build(*sys.argv[1:])
+    print(f"图缓存：{len(compiled.node_ids)} 个节点，{len(compiled.indices)} 条有向边，"
+          f"摘要 {compiled.digest[:16]}")
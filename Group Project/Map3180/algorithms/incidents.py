@@ -0,0 +1,99 @@
+"""
+事件（暴雨、车祸等）覆盖层：基础边权保持不变，每个事件是一个句柄，记录自己影响的边和惩罚倍数。
+有效边权 = 基础边权 × 该边上所有事件倍数的合成值（重叠的事件取最大倍数，不会叠乘）。
+添加或移除单个事件的代价与它影响的边数成正比；返回的受影响边交给 PathService 提升图版本。
+"""
+import itertools
+
+
+class Incident:
+    """单个事件的句柄，由 IncidentOverlay.add 创建"""
+
+    def __init__(self, incident_id: int, edges: tuple, factor: float, kind: str = None,
+                 center: tuple = None, radius: float = None):
+        self.incident_id = incident_id
+        self.edges = edges  # 受影响的有向边 ((u, v), ...)，两个方向都包含在内
+        self.factor = factor
+        self.kind = kind
+        self.center = center
+        self.radius = radius
+
+    def __repr__(self):
+        return (f"Incident(id={self.incident_id}, kind={self.kind!r}, "
+                f"factor={self.factor}, edges={len(self.edges)})")
+
+
+class IncidentOverlay:
+    """
+    叠加在基础图上的事件集合。
+        overlay = IncidentOverlay()
+        storm = overlay.add(edges, factor=50.0, kind="rainstorm")
+        overlay.multiplier(u, v)   # 1.0 表示不受影响
+        overlay.remove(storm)
+    """
+
+    def __init__(self):
+        self._incidents = {}  # incident_id -> Incident，按添加顺序
+        self._edge_factors = {}  # (u, v) -> {incident_id: factor}
+        self._multipliers = {}  # (u, v) -> 合成倍数，只含受影响的边
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._incidents)
+
+    def __iter__(self):
+        return iter(self._incidents.values())
+
+    def __contains__(self, incident):
+        return getattr(incident, "incident_id", incident) in self._incidents
+
+    @staticmethod
+    def combine(factors) -> float:
+        """同一条边上多个事件倍数的合成规则：取最大值"""
+        return max(factors)
+
+    def add(self, edges, factor: float, **meta) -> Incident:
+        """
+        添加一个事件。
+        :param edges: 受影响的有向边 [(u, v), ...]（调用方负责包含两个方向）
+        :param factor: 惩罚倍数
+        :param meta: kind / center / radius 等描述信息，保存在句柄上
+        """
+        incident = Incident(next(self._ids), tuple(dict.fromkeys(edges)), factor, **meta)
+        self._incidents[incident.incident_id] = incident
+        for edge in incident.edges:
+            self._edge_factors.setdefault(edge, {})[incident.incident_id] = factor
+            self._multipliers[edge] = self.combine(self._edge_factors[edge].values())
+        return incident
+
+    def remove(self, incident) -> tuple:
+        """
+        移除一个事件（句柄或 ID），返回受影响的边；事件不存在时返回空元组
+        """
+        incident = self._incidents.pop(getattr(incident, "incident_id", incident), None)
+        if incident is None:
+            return ()
+        for edge in incident.edges:
+            factors = self._edge_factors[edge]
+            del factors[incident.incident_id]
+            if factors:
+                self._multipliers[edge] = self.combine(factors.values())
+            else:
+                del self._edge_factors[edge]
+                del self._multipliers[edge]
+        return incident.edges
+
+    def clear(self) -> list:
+        """移除所有事件，返回受影响的边"""
+        edges = list(self._multipliers)
+        self._incidents.clear()
+        self._edge_factors.clear()
+        self._multipliers.clear()
+        return edges
+
+    def multiplier(self, u, v) -> float:
+        return self._multipliers.get((u, v), 1.0)
+
+    def multipliers(self) -> dict:
+        """受影响的边及其合成倍数 {(u, v): factor}（只读视图，不要修改）"""
+        return self._multipliers
@@ -0,0 +1,141 @@
+import configparser
+import os
+import threading
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '../config/q_learning.ini')
+
+
+def load_learning_config(config_path=CONFIG_PATH):
+    """加载 Q-learning 配置"""
+    config = configparser.ConfigParser()
+
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"配置文件不存在：{config_path}")
+
+    # 修改此处，明确指定编码格式
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config.read_file(f)  # 使用read_file替代read
+
+    section = config['learning_parameters']
+    return {
+        'alpha': float(section['alpha']),
+        'gamma': float(section['gamma']),
+        'epsilon': float(section['epsilon']),
+        'episodes': int(section['episodes']),
+        'batch_size': section.getint('batch_size', fallback=1),
+        'max_steps': section.getint('max_steps', fallback=0),
+        'tolerance': section.getfloat('tolerance', fallback=0.0),
+        'window': section.getint('window', fallback=500),
+        'patience': section.getint('patience', fallback=0),
+        'check_interval': section.getint('check_interval', fallback=500),
+        'progress_interval': section.getint('progress_interval', fallback=100)
+    }
+
+
+class LearningConfig:
+    """
+    Q-learning 参数。按调用传给 q_learning 等训练函数，便于在同一进程内做参数扫描：
+        cfg = get_config().replace(alpha=0.2, episodes=5000)
+        q_learning(graph, start, goal, config=cfg)
+    """
+
+    # 配置文件读取失败时使用的默认参数
+    DEFAULTS = {
+        'alpha': 0.3,
+        'gamma': 0.95,
+        'epsilon': 0.5,
+        'episodes': 2000,
+        'batch_size': 1,
+        'max_steps': 0,
+        'tolerance': 0.0,
+        'window': 500,
+        'patience': 0,
+        'check_interval': 500,
+        'progress_interval': 100,
+    }
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.DEFAULTS)
+        if unknown:
+            raise TypeError(f"未知的学习参数：{sorted(unknown)}")
+        values = {**self.DEFAULTS, **params}
+        self.alpha = values['alpha']
+        self.gamma = values['gamma']
+        self.epsilon = values['epsilon']
+        self.episodes = values['episodes']
+        self.batch_size = values['batch_size']
+        self.max_steps = values['max_steps']
+        self.tolerance = values['tolerance']
+        self.window = values['window']
+        self.patience = values['patience']
+        self.check_interval = values['check_interval']
+        self.progress_interval = values['progress_interval']
+
+    @classmethod
+    def from_file(cls, config_path=CONFIG_PATH):
+        return cls(**load_learning_config(config_path))
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.DEFAULTS}
+
+    def replace(self, **changes):
+        """返回修改了部分参数的新配置，原配置不变"""
+        return LearningConfig(**{**self.as_dict(), **changes})
+
+    def stopping_settings(self) -> dict:
+        """提前停止参数"""
+        return {
+            'tolerance': self.tolerance,
+            'window': self.window,
+            'patience': self.patience,
+            'check_interval': self.check_interval,
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, LearningConfig) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        params = ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"LearningConfig({params})"
+
+
+class _ConfigFile:
+    """首次使用时才读取配置文件；文件修改时间变化后自动重新读取"""
+
+    def __init__(self, config_path=CONFIG_PATH):
+        self.config_path = config_path
+        self._config = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self) -> LearningConfig:
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.config_path)
+            except OSError:
+                mtime = None
+            if self._config is None or mtime != self._mtime:
+                self._mtime = mtime
+                self._config = self._load(self._config)
+            return self._config
+
+    def _load(self, previous):
+        try:
+            config = LearningConfig.from_file(self.config_path)
+            if previous is not None and config != previous:
+                print(f"配置文件已更新，重新加载：{config}")
+            return config
+        except (OSError, KeyError, ValueError, configparser.Error) as e:
+            if previous is not None:
+                print(f"配置文件重新加载失败，沿用当前参数：{e}")
+                return previous
+            print(f"配置文件加载失败，使用默认参数：{e}")
+            return LearningConfig()
+
+
+_config_file = _ConfigFile()
+
+
+def get_config() -> LearningConfig:
+    """当前生效的配置（懒加载，config/q_learning.ini 修改后热重载）"""
+    return _config_file.get()
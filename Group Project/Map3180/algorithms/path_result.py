@@ -0,0 +1,98 @@
+"""
+路径计算结果：节点 ID、坐标、逐段长度、累计距离和方向在求解后一次算好，
+地图组件绘制路线和生成导航文字时只需顺序读取，代价与路径长度成正比。
+"""
+import itertools
+import math
+
+# 方位角（度，x 轴正向为 0，逆时针为正，屏幕 y 轴向下）所属的方向区间
+_DIRECTION_SECTORS = (
+    (-12.5, 12.5, "east"),
+    (12.5, 77.5, "northeast"),
+    (77.5, 102.5, "north"),
+    (102.5, 167.5, "northwest"),
+    (-167.5, -102.5, "southwest"),
+    (-102.5, -77.5, "south"),
+    (-77.5, -12.5, "southeast"),
+)
+
+
+def bearing(start: tuple, end: tuple) -> float:
+    """从 start 指向 end 的方位角（度）；屏幕坐标 y 向下，因此向上为 90°"""
+    return math.degrees(math.atan2(start[1] - end[1], end[0] - start[0]))
+
+
+def compass_direction(start: tuple, end: tuple) -> str:
+    """八方向名称（east / northeast / ... ）"""
+    dx = end[0] - start[0]
+    dy = start[1] - end[1]  # Inverted y-axis
+
+    # Handle straight directions
+    if dx == 0:
+        return "north" if dy > 0 else "south"
+    if dy == 0:
+        return "east" if dx > 0 else "west"
+
+    angle = math.degrees(math.atan2(dy, dx))
+    for low, high, name in _DIRECTION_SECTORS:
+        if low <= angle < high:
+            return name
+    return "west"
+
+
+class PathResult:
+    """
+    一条路径的完整描述。按坐标序列使用时（len / 下标 / 迭代）与旧的 path_coords 列表相同。
+        node_ids    节点 ID 列表
+        coords      节点坐标列表
+        lengths     第 i 段（node_ids[i] -> node_ids[i+1]）的长度（千米，当前边权）
+        cumulative  到第 i 个节点为止的累计距离，cumulative[0] == 0
+        bearings    第 i 段的方位角（度）
+        directions  第 i 段的八方向名称
+    """
+
+    def __init__(self, node_ids: list, coords: list, lengths: list):
+        self.node_ids = node_ids
+        self.coords = coords
+        self.lengths = lengths
+        self.cumulative = list(itertools.accumulate(lengths, initial=0.0))
+        segments = list(zip(coords, coords[1:]))
+        self.bearings = [bearing(a, b) for a, b in segments]
+        self.directions = [compass_direction(a, b) for a, b in segments]
+
+    @classmethod
+    def from_ids(cls, path_ids: list, nodes: dict, graph: dict):
+        """由节点 ID 路径构建，长度取自 graph 中的当前边权"""
+        coords = [nodes[node_id] for node_id in path_ids]
+        lengths = [graph[u][v] for u, v in zip(path_ids, path_ids[1:])]
+        return cls(list(path_ids), coords, lengths)
+
+    @property
+    def total_length(self) -> float:
+        return self.cumulative[-1]
+
+    @property
+    def num_segments(self) -> int:
+        return len(self.lengths)
+
+    def legs(self) -> list:
+        """把方向相同的连续路段合并为一段：[(方向, 长度), ...]"""
+        legs = []
+        for direction, length in zip(self.directions, self.lengths):
+            if legs and legs[-1][0] == direction:
+                legs[-1] = (direction, legs[-1][1] + length)
+            else:
+                legs.append((direction, length))
+        return legs
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        return self.coords[index]
+
+    def __iter__(self):
+        return iter(self.coords)
+
+    def __repr__(self):
+        return f"PathResult({len(self.node_ids)} nodes, {self.total_length:.3f}km)"
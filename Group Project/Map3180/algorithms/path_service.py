@@ -1,69 +1,482 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-from .q_learning import (
-    read_node_data, 
-    read_edge_data, 
-    q_learning, 
-    extract_path
-)
+from .cancellation import CancelToken, CalculationCancelled
+from .learning_config import LearningConfig, get_config
+from .csr_graph import CSRGraph
+from .q_learning_csr import q_learning_csr, q_learning_batched
+from .shortest_path import dijkstra, astar
+from .q_cache import QTableCache
+from .policy_pool import precompute_policies, follow_policy
+from . import all_pairs
+from .value_iteration import value_iteration
+from .contraction import ContractedGraph
+from . import contraction_hierarchies
+from . import graph_cache
+from .spatial_index import NodeIndex, EdgeIndex
+from .incidents import IncidentOverlay
+from .station_partition import StationPartition
+from .path_result import PathResult
+import functools
 import math
+import threading
+
+import numpy as np
+
+# 可选的路径求解器：qlearning（课程演示用）、value_iteration（基于模型的 RL）、
+# dijkstra、astar（交互式路径规划推荐）、ch（收缩层次，适合 1000 节点以上的地图）
+SOLVERS = ("qlearning", "value_iteration", "dijkstra", "astar", "ch")
+
 
 class PathService(QObject):
-    path_calculated = pyqtSignal(list)
+    path_calculated = pyqtSignal(object)  # PathResult
     calculation_failed = pyqtSignal(str)
+    warm_progress = pyqtSignal(int, int)  # 预热进度 (已完成终点数, 终点总数)
+    # Q-learning 训练进度 (请求编号, 轮次, 总轮次, 累计步数, 已用秒数, 最大 |ΔQ|, 贪婪路径边数)，
+    # 从工作线程发出；未编号的请求编号为 -1，其余参数含义见 q_learning.TrainingProgress
+    training_progress = pyqtSignal(int, int, int, int, float, float, int)
+
+    EDGE_LOG_LIMIT = 256  # 边变化记录最多保留的版本数
 
-    def __init__(self):
+    def __init__(self, solver: str = "qlearning", contract: bool = False):
+        """
+        :param solver: 默认求解器，见 SOLVERS
+        :param contract: 是否先收缩图（剪除断头支路、合并途经节点链）再求解
+        """
         super().__init__()
+        if solver not in SOLVERS:
+            raise ValueError(f"未知的求解器：{solver}，可选 {SOLVERS}")
+        self.solver = solver
+        self.use_contraction = contract
         self.nodes = None
         self.graph = None
-        self.original_costs = {}  # 用来保存边的原始代价
+        self.node_index = None  # 节点空间索引，加载数据时构建
+        self.edge_index = None  # 边空间索引，首次放置惩罚区域时构建
+        self.incidents = IncidentOverlay()  # 暴雨、车祸等事件，self.graph 中的边权 = 基础边权 × 事件倍数
+        self._base_weights = {}  # 受事件影响的边的基础边权 {(u, v): weight}
+        self._base_csr = None  # 基础边权下的 CSR 图（加载数据后不变）
+        self._csr = None  # 当前有效边权下的 CSR 缓存，边权变化时置空
+        self._contracted = None  # 收缩图缓存，边权变化时置空
+        self.graph_version = 0  # 边权每变化一次加 1，用于缓存失效
+        self._edge_changes = {}  # 图版本 -> 该版本相对上一版本变化的边
+        self.q_cache = QTableCache()
+        self._policies = {}  # 终点 -> {state: next_state}，由 warm_all 预先计算
+        self._policies_key = None  # (图版本, 策略类型)
+        self.warm_workers = None  # 预热使用的进程数，None 表示 CPU 核数
+        self.all_pairs = None  # 无惩罚时的全源最短路表（见 algorithms/all_pairs.py）
+        self.ch_index = None  # 收缩层次索引，首次使用 ch 求解器时读取缓存或构建
+        self._data_files = (None, None)
+        self._data_digest = None  # 数据文件内容摘要，各类缓存共用
         self.station_ids = [4, 23, 11, 46, 32, 52]
+        self._stations = None  # 充电站 Voronoi 划分，首次查询最近充电站时构建
+        self._stations_lock = threading.Lock()
+        self.config = None  # 覆盖配置文件的 LearningConfig；None 时每次求解读取（热重载）配置文件
+        self._request_lock = threading.Lock()
+        self._latest_request = 0  # 最新的请求编号，由 next_request 分配
+        self._cancel_token = None  # 最新请求的取消标记
 
     def initialize_data(self, node_file: str, edge_file: str):
         """初始化节点和边数据"""
         try:
-            self.nodes = read_node_data(node_file)
-            self.graph = read_edge_data(edge_file, self.nodes)
+            # 二进制图缓存新鲜时直接内存映射读取，否则解析文本并重新编译缓存
+            compiled = graph_cache.load_or_build(node_file, edge_file)
+            self.nodes = compiled.nodes_dict()
+            self.graph = compiled.graph_dict()
             if not self.nodes or not self.graph:
                 raise ValueError("数据文件内容为空")
+            # 图结构可能改变，旧 Q 表不能再作为热启动种子
+            self.q_cache.clear()
+            self._edge_changes.clear()
+            self.incidents.clear()
+            self._base_weights.clear()
+            self._stations = None
+            self._data_files = (node_file, edge_file)
+            self._data_digest = compiled.digest
+            self.node_index = NodeIndex(compiled.node_ids, compiled.coords)
+            self.edge_index = None
+            self.ch_index = None
+            self._graph_changed()
+            self._base_csr = self._csr = compiled.csr()
+            self.all_pairs = all_pairs.load_or_build(
+                self.graph, node_file, edge_file,
+                build=len(self.graph) <= all_pairs.AUTO_BUILD_LIMIT, digest=compiled.digest)
         except Exception as e:
             raise RuntimeError(f"数据加载失败：{str(e)}")
 
-    def calculate_path(self, start_id: int, end_id: int):
-        """执行路径计算"""
+    def learning_config(self) -> LearningConfig:
+        """本次求解使用的学习参数"""
+        return self.config or get_config()
+
+    def build_all_pairs(self, node_file: str, edge_file: str, cache_dir: str = None):
+        """手动构建（或读取）全源最短路表，适用于超过自动构建上限的大图"""
+        self.all_pairs = all_pairs.load_or_build(self.graph, node_file, edge_file, cache_dir)
+        return self.all_pairs
+
+    def nearest_node(self, point: tuple, max_distance: float = math.inf):
+        """
+        离 point 最近的节点 ID（基于空间索引）
+        :param max_distance: 只考虑距离小于该值的节点，没有时返回 None
+        """
+        if self.node_index is None:
+            return None
+        return self.node_index.nearest(point[0], point[1], max_distance)
+
+    def k_nearest_nodes(self, point: tuple, k: int, max_distance: float = math.inf) -> list:
+        """离 point 最近的 k 个节点 [(id, 距离)]，按距离升序"""
+        if self.node_index is None:
+            return []
+        return self.node_index.k_nearest(point[0], point[1], k, max_distance)
+
+    def _penalized(self) -> bool:
+        """是否有边受事件影响（有效边权不同于基础边权）"""
+        return bool(self._base_weights)
+
+    def _all_pairs_valid(self) -> bool:
+        """全源表基于原始边权，存在惩罚区域时不可用"""
+        return self.all_pairs is not None and not self._penalized()
+
+    def calculate_path(self, start_id: int, end_id: int, solver: str = None,
+                       request_id: int = None, to_station: bool = False):
+        """
+        执行路径计算
+        :return: PathResult；被取消或失败时返回 None
+        :param solver: 求解器名称（见 SOLVERS），默认使用 self.solver
+        :param request_id: next_request() 分配的请求编号。提供时，被更新的请求取代或被
+            cancel_pending 取消的计算会尽快停止，不发出任何信号，返回 None
+        :param to_station: 终点是 find_nearest_station 给出的最近充电站：
+            直接沿充电站划分的下一跳取出最短路，不再运行求解器
+        """
+        cancel = self._request_token(request_id)
         try:
-            Q = q_learning(self.graph, start_id, end_id)
-            path_ids = extract_path(Q, start_id, end_id)
+            if cancel is not None:
+                cancel.check()  # 在线程池中排队期间已被取代
+            path_ids = self._station_route(start_id, end_id) if to_station else None
+            if path_ids is None:
+                progress = functools.partial(self.training_progress.emit,
+                                             -1 if request_id is None else request_id)
+                path_ids = self._solve_path_ids(start_id, end_id, solver or self.solver, cancel,
+                                                progress)
+            if cancel is not None:
+                cancel.check()
 
-            # 计算路径总长度
-            total_length = 0.0
-            for i in range(len(path_ids) - 1):
-                total_length += self.graph[path_ids[i]][path_ids[i + 1]]
+            # 逐段长度、累计距离和方向一次算好
+            result = PathResult.from_ids(path_ids, self.nodes, self.graph)
 
             # 打印结果
             print("\n计算完成的最优路径:")
             print(" -> ".join(map(str, path_ids)))
-            print(f"路径总长度: {total_length:.2f}")
+            print(f"路径总长度: {result.total_length:.2f}")
 
-            path_coords = [self.nodes[node_id] for node_id in path_ids]
-            self.path_calculated.emit(path_coords)
-            print("路径计算完成！", "path_coords:", path_coords)
+            self.path_calculated.emit(result)
+            print("路径计算完成！", "path_coords:", result.coords)
             print("path_ids:", path_ids)
-            # 返回路径坐标列表，交给地图组件显示
-            return path_coords
+            # 返回 PathResult（可按坐标列表使用），交给地图组件显示
+            return result
 
+        except CalculationCancelled:
+            print(f"请求 {request_id} 已被取消，丢弃结果")
         except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                return None
             self.calculation_failed.emit(str(e))
 
-    import math
+    def next_request(self) -> int:
+        """
+        在提交计算任务时登记一个新请求，并取消所有更早的请求
+        （包括还在线程池中排队、尚未开始的任务）
+        :return: 传给 calculate_path 的请求编号
+        """
+        with self._request_lock:
+            if self._cancel_token is not None:
+                self._cancel_token.cancel()
+            self._latest_request += 1
+            self._cancel_token = CancelToken()
+            return self._latest_request
+
+    def _request_token(self, request_id):
+        """请求对应的取消标记；已被取代的请求得到一个已取消的标记，未编号的请求为 None"""
+        if request_id is None:
+            return None
+        with self._request_lock:
+            if request_id == self._latest_request:
+                return self._cancel_token
+        token = CancelToken()
+        token.cancel()
+        return token
+
+    def cancel_pending(self):
+        """取消正在计算的最新请求（例如用户重置了选择）"""
+        with self._request_lock:
+            if self._cancel_token is not None:
+                self._cancel_token.cancel()
+
+    def warm_all(self, solver: str = None, max_workers: int = None) -> int:
+        """
+        预热模式：用进程池为每个终点预先训练/求解路由策略，
+        之后任意起点/终点的查询都只是一次查表。
+        进度通过 warm_progress 信号发出。整个预计算是同步的，GUI 中应在工作线程调用
+        （见 gui.map_canvas.WarmWorker）。
+        :return: 预热的终点数量
+        """
+        solver = solver or self.solver
+        if solver not in SOLVERS:
+            raise ValueError(f"未知的求解器：{solver}，可选 {SOLVERS}")
+        # 预计算期间可能增删事件：按开始时的图快照计算，结果记在开始时的版本下
+        version = self.graph_version
+        graph = {u: dict(neighbors) for u, neighbors in self.graph.items()}
+        goals = [node_id for node_id in self.nodes if node_id in graph]
+        policies = precompute_policies(
+            graph, goals, solver,
+            max_workers=max_workers or self.warm_workers,
+            progress=self.warm_progress.emit,
+            config=self.learning_config(),
+        )
+        self._policies_key = None  # 先使旧结果失效，查询线程不会把新表和旧版本配在一起
+        self._policies = policies
+        self._policies_key = (version, self._policy_kind(solver))
+        print(f"预热完成：{len(self._policies)} 个终点（{solver}）")
+        return len(self._policies)
+
+    @staticmethod
+    def _policy_kind(solver: str) -> str:
+        # dijkstra、astar 与 ch 的最短路树相同，可共用预热结果
+        return solver if solver in ("qlearning", "value_iteration") else "exact"
+
+    def _solve_path_ids(self, start_id: int, end_id: int, solver: str, cancel=None,
+                        progress=None) -> list:
+        """
+        按指定求解器计算节点 ID 路径
+        :param cancel: 可选的 CancelToken，传给迭代/训练循环
+        :param progress: 训练进度回调，参数同 q_learning.TrainingProgress
+        """
+        # 训练期间 GUI 线程可能增删事件、提升图版本：版本和 CSR 在入口处各取一次，
+        # 训练结果按开始时的版本缓存，不会被当作新版本的表
+        version = self.graph_version
+        csr = self._get_csr()
+        if self._policies_key == (version, self._policy_kind(solver)) \
+                and end_id in self._policies:
+            path_ids = follow_policy(self._policies[end_id], start_id, end_id)
+            if path_ids[-1] == end_id:
+                return path_ids
+
+        if solver in ("dijkstra", "astar", "ch") and self._all_pairs_valid():
+            return self.all_pairs.path(start_id, end_id)
+        if solver == "ch":
+            if self._penalized():
+                # CH 索引基于原始边权，存在惩罚区域时退回到实时图上的 A*
+                return astar(self.graph, self.nodes, start_id, end_id)
+            return self._get_ch_index().path(start_id, end_id)
+        if self.use_contraction:
+            return self._solve_contracted(start_id, end_id, solver, cancel, progress)
+        if solver == "dijkstra":
+            return dijkstra(self.graph, start_id, end_id)
+        if solver == "astar":
+            return astar(self.graph, self.nodes, start_id, end_id)
+        if solver == "value_iteration":
+            # 无折扣（Bellman-Ford 式）扫描，贪婪策略就是精确最短路
+            Q, stats = value_iteration(csr, end_id, gamma=1.0, return_stats=True, cancel=cancel)
+            print(f"值迭代结束：{stats['sweeps']} 次扫描，停止原因 {stats['stop_reason']}")
+            return csr.extract_path(Q, start_id, end_id)
+        if solver != "qlearning":
+            raise ValueError(f"未知的求解器：{solver}，可选 {SOLVERS}")
+
+        # 同一终点的 Q 表覆盖所有起点：只换起点时直接复用
+        Q = self.q_cache.get(end_id, version)
+        if Q is not None:
+            path_ids = csr.extract_path(Q, start_id, end_id)
+            if path_ids[-1] == end_id:
+                print(f"复用终点 {end_id} 的 Q 表")
+                return path_ids
+
+        # 无向图上的反向查询：用以起点为终点的 Q 表求出反向路径再倒序
+        Q = self.q_cache.get(start_id, version)
+        if Q is not None:
+            path_ids = csr.extract_path(Q, end_id, start_id)
+            if path_ids[-1] == start_id and self._is_reversible(path_ids):
+                print(f"复用终点 {start_id} 的 Q 表（反向路径）")
+                return path_ids[::-1]
+
+        # 事故/暴雨只改变了少数边：以旧 Q 表热启动，围绕变化边做少量训练
+        seed_Q, changed_edges = None, None
+        seed = self.q_cache.get_seed(end_id, version)
+        if seed is not None:
+            seed_version, seed_Q = seed
+            changed_edges = self._changes_since(seed_version, version)
+            if changed_edges is None:
+                seed_Q = None  # 种子太旧，变化记录已丢弃，从头训练
+            else:
+                print(f"以版本 {seed_version} 的 Q 表热启动，变化边数：{len(changed_edges)}")
+
+        config = self.learning_config()
+        if config.batch_size > 1:
+            Q, stats = q_learning_batched(csr, start_id, end_id, config.batch_size,
+                                          Q=seed_Q, changed_edges=changed_edges,
+                                          return_stats=True, config=config,
+                                          progress=progress, cancel=cancel)
+        else:
+            Q, stats = q_learning_csr(csr, start_id, end_id, Q=seed_Q,
+                                      changed_edges=changed_edges, return_stats=True,
+                                      config=config, progress=progress, cancel=cancel)
+        print(f"训练结束：{stats['episodes']} 轮，{stats['steps']} 步，停止原因 {stats['stop_reason']}")
+        self.q_cache.put(end_id, version, Q)
+        return csr.extract_path(Q, start_id, end_id)
+
+    def _get_ch_index(self):
+        """读取或构建 CH 索引（按数据文件摘要缓存在磁盘上，跨会话复用）"""
+        if self.ch_index is None:
+            self.ch_index = contraction_hierarchies.load_or_build(self.graph, *self._data_files,
+                                                                  digest=self._data_digest)
+        return self.ch_index
+
+    def _solve_contracted(self, start_id: int, end_id: int, solver: str, cancel=None,
+                          progress=None) -> list:
+        """在收缩图上求解，再把捷径边展开成完整节点路径"""
+        if self._contracted is None:
+            self._contracted = ContractedGraph(self.graph, keep=self.station_ids)
+            print(f"图收缩：{len(self.graph)} -> {len(self._contracted.graph)} 个节点")
+        graph, s, t, expand = self._contracted.prepare_query(start_id, end_id)
+        if graph is None or s == t:
+            return expand([s])
+
+        if solver == "dijkstra":
+            return expand(dijkstra(graph, s, t))
+        if solver == "astar":
+            return expand(astar(graph, self.nodes, s, t))
+        csr = CSRGraph(graph)
+        config = self.learning_config()
+        if solver == "value_iteration":
+            Q = value_iteration(csr, t, gamma=1.0, cancel=cancel)
+        elif config.batch_size > 1:
+            Q = q_learning_batched(csr, s, t, config.batch_size, config=config,
+                                   progress=progress, cancel=cancel)
+        else:
+            Q = q_learning_csr(csr, s, t, config=config, progress=progress, cancel=cancel)
+        return expand(csr.extract_path(Q, s, t))
+
+    def _is_reversible(self, path_ids: list) -> bool:
+        """路径上每条边的正反两个方向代价都相同"""
+        for u, v in zip(path_ids, path_ids[1:]):
+            if self.graph.get(v, {}).get(u) != self.graph[u][v]:
+                return False
+        return True
+
+    def _graph_changed(self, changed_edges=()):
+        """边权发生变化：提升图版本，丢弃 CSR 缓存，过期的 Q 表不再直接命中"""
+        self.graph_version += 1
+        self._edge_changes[self.graph_version] = set(changed_edges)
+        self._csr = None
+        self._contracted = None
+        self.q_cache.invalidate(self.graph_version)
+        self._prune_edge_changes()
+
+    def _prune_edge_changes(self):
+        """
+        变化记录只需覆盖仍可能被查询的版本区间：最旧的 Q 表种子和充电站划分之后的版本。
+        更早的记录丢弃；最多保留 EDGE_LOG_LIMIT 个版本，长时间反复增删事件时记录不会无限增长，
+        更旧的种子/划分改为从头计算
+        """
+        floor = self.graph_version
+        oldest = self.q_cache.oldest_version()
+        if oldest is not None:
+            floor = min(floor, oldest)
+        partition = self._stations
+        if partition is not None and partition.version is not None:
+            floor = min(floor, partition.version)
+        floor = max(floor, self.graph_version - self.EDGE_LOG_LIMIT)
+        for v in [v for v in self._edge_changes if v <= floor]:
+            del self._edge_changes[v]
+
+    def _changes_since(self, version: int, until: int = None):
+        """
+        版本 version 之后、直到 until（默认当前版本）为止所有变化过的边；
+        这段区间的记录已被丢弃时返回 None（调用方应从头计算）
+        """
+        until = self.graph_version if until is None else until
+        changed = set()
+        for v in range(version + 1, until + 1):
+            if v not in self._edge_changes:
+                return None
+            changed |= self._edge_changes[v]
+        return changed
+
+    def _get_csr(self) -> CSRGraph:
+        """
+        按需得到当前有效边权下的 CSR 图：结构与基础 CSR 共享，
+        只把受事件影响的边的权重替换为 基础边权 × 倍数
+        """
+        csr = self._csr
+        if csr is None:
+            version = self.graph_version
+            if self._base_csr is None:
+                base = CSRGraph(self.graph)
+                self._base_csr = base.with_weights(self._overlay_weights(base, self._base_weights))
+            csr = self._base_csr
+            if self._penalized():
+                effective = {edge: self._base_weights[edge] * factor
+                             for edge, factor in self.incidents.multipliers().items()}
+                csr = self._base_csr.with_weights(self._overlay_weights(self._base_csr, effective))
+            # 构建期间边权又变了（工作线程与 GUI 线程并发）：本次照常使用，但不缓存
+            if version == self.graph_version:
+                self._csr = csr
+        return csr
+
+    @staticmethod
+    def _overlay_weights(csr: CSRGraph, weights: dict):
+        """csr 的边权副本，其中 weights 中的边替换为给定值"""
+        result = np.array(csr.weights, dtype=np.float64)
+        for (u, v), w in weights.items():
+            slot = csr.edge_slot(u, v)
+            if slot >= 0:
+                result[slot] = w
+        return result
+
+    def _get_edge_index(self) -> EdgeIndex:
+        """按需构建边空间索引（只依赖边的端点坐标，边权变化不影响）"""
+        if self.edge_index is None:
+            self.edge_index = EdgeIndex.from_csr(self._get_csr(), self.nodes)
+        return self.edge_index
+
+    def _get_stations(self) -> StationPartition:
+        """
+        当前边权下的充电站划分：充电站集合变化时重建，
+        边权变化时只按变化的边增量更新
+        """
+        with self._stations_lock:
+            partition = self._stations
+            changed = None
+            if partition is not None and partition.station_ids == tuple(self.station_ids):
+                changed = self._changes_since(partition.version)
+            if changed is None:
+                # 首次使用、充电站集合变化或变化记录已丢弃：整体重建
+                partition = StationPartition(self.graph, self.station_ids)
+            elif partition.version != self.graph_version:
+                relabeled = partition.update(self.graph, changed)
+                print(f"充电站划分增量更新：重新计算 {relabeled} 个节点")
+            partition.version = self.graph_version
+            self._stations = partition
+            return partition
+
+    def _station_route(self, start_id: int, station_id: int):
+        """start_id 到其最近充电站的最短路（O(路径长度)）；station_id 不是它的最近充电站时返回 None"""
+        partition = self._get_stations()
+        if partition.nearest(start_id) != station_id:
+            return None
+        return partition.path(start_id)
 
     def find_nearest_station(self, start_id: int) -> int:
         """
-        使用经纬度坐标计算欧几里得距离寻找最近充电站
-        （基于 read_node_data() 返回的 {id: (lat, lon)} 格式）
+        按道路距离寻找最近充电站：查询充电站 Voronoi 划分（多源 Dijkstra 预先计算，
+        事件增删后增量更新）。无法沿道路到达任何充电站时，退回到按坐标的欧几里得距离
+        （基于 read_node_data() 返回的 {id: (lat, lon)} 格式）。
         """
         if not self.nodes or start_id not in self.nodes:
             raise ValueError("起点ID不存在或节点数据未加载")
 
+        partition = self._get_stations()
+        nearest_station_id = partition.nearest(start_id)
+        if nearest_station_id is not None:
+            print(f"最近充电站: {nearest_station_id} "
+                  f"(道路距离: {partition.distance(start_id):.3f}km)")
+            return nearest_station_id
+
         # 获取起点经纬度
         start_lat, start_lon = self.nodes[start_id]
         min_distance = float('inf')
@@ -94,42 +507,61 @@ class PathService(QObject):
         print(f"最近充电站: {station_id} (校准距离: {min_distance:.6f})")
         return nearest_station_id
 
-    def apply_penalty_area(self, center: tuple, radius: float, penalty_factor: float = 1000.0):
+    def apply_penalty_area(self, center: tuple, radius: float, penalty_factor: float = 1000.0,
+                           kind: str = None):
         """
-        对落在指定圆形区域内的路径增加代价。
+        添加一个事件：对与指定圆形区域相交的路径（线段穿过圆即算）增加代价。
+        事件之间互不覆盖，可以单独移除（见 remove_incident）。
         :param center: (x, y) 圆心坐标
         :param radius: 圆半径
         :param penalty_factor: 惩罚倍数，默认为 1000 倍
+        :param kind: 事件类型描述，例如 "rainstorm"、"crash"
+        :return: 事件句柄 Incident；没有受影响的边时返回 None
         """
         if self.nodes is None or self.graph is None:
             print("图数据未初始化，无法应用惩罚区域。")
-            return
-
-        cx, cy = center
-        for u in self.graph:
-            for v in self.graph[u]:
-                if v not in self.nodes or u not in self.nodes:
-                    continue
-                x1, y1 = self.nodes[u]
-                x2, y2 = self.nodes[v]
-                mx = (x1 + x2) / 2
-                my = (y1 + y2) / 2
-                dist_sq = (mx - cx) ** 2 + (my - cy) ** 2
-                if dist_sq <= radius ** 2:
-                    # 如果这条边尚未保存过原始代价，保存原始代价
-                    if (u, v) not in self.original_costs:
-                        self.original_costs[(u, v)] = self.graph[u][v]
-
-                    # 应用惩罚
-                    original_cost = self.graph[u][v]
-                    self.graph[u][v] = original_cost * penalty_factor
-                    print(f"边 ({u}, {v}) 位于惩罚区域内，代价从 {original_cost} 增加到 {self.graph[u][v]}")
+            return None
+
+        # 空间索引登记了每个有向边，同一条路的两个方向几何相同，会一起被选中
+        edges = self._get_edge_index().intersecting_circle(center, radius)
+        if not edges:
+            return None
+        incident = self.incidents.add(edges, penalty_factor, kind=kind, center=center, radius=radius)
+        self._refresh_edges(incident.edges)
+        print(f"事件 {incident.incident_id}（{kind or '惩罚区域'}）：{len(incident.edges)} 条边，"
+              f"惩罚倍数 {penalty_factor}")
+        return incident
+
+    def remove_incident(self, incident) -> bool:
+        """
+        移除单个事件（句柄或 ID），恢复它影响的边的代价
+        :return: 事件是否存在
+        """
+        edges = self.incidents.remove(incident)
+        if not edges:
+            return False
+        self._refresh_edges(edges)
+        print(f"事件 {getattr(incident, 'incident_id', incident)} 已移除，恢复 {len(edges)} 条边")
+        return True
 
     def reset_penalty(self):
-        """重置惩罚并恢复所有边的原始代价"""
-        if self.original_costs:
-            for (u, v), original_cost in self.original_costs.items():
-                self.graph[u][v] = original_cost  # 恢复原始代价
-                print(f"恢复边 ({u}, {v}) 的代价为 {original_cost}")
-            # 清空原始代价字典
-            self.original_costs.clear()
+        """重置惩罚：移除所有事件并恢复所有边的原始代价"""
+        edges = self.incidents.clear()
+        if edges:
+            self._refresh_edges(edges)
+            print(f"已移除所有事件，恢复 {len(edges)} 条边")
+
+    def _refresh_edges(self, edges):
+        """按 基础边权 × 事件倍数 重新计算这些边的有效代价，并提升图版本"""
+        multipliers = self.incidents.multipliers()
+        for u, v in edges:
+            base = self._base_weights.get((u, v))
+            if base is None:
+                base = self._base_weights[(u, v)] = self.graph[u][v]
+            factor = multipliers.get((u, v))
+            if factor is None:
+                self.graph[u][v] = base
+                del self._base_weights[(u, v)]
+            else:
+                self.graph[u][v] = base * factor
+        self._graph_changed(edges)
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .csr_graph import CSRGraph
+from .q_learning_csr import q_learning_csr
+from .shortest_path import shortest_path_tree
+from .value_iteration import value_iteration
+
+# 工作进程内的图数据，由 _init_worker 在进程启动时设置一次
+_graph = None
+_csr = None
+_config = None
+
+
+def _init_worker(graph, config=None):
+    """进程池初始化：每个工作进程只接收一次已解析好的图和学习参数，不重新读文件"""
+    global _graph, _csr, _config
+    _graph = graph
+    _csr = CSRGraph(graph)
+    _config = config
+
+
+def _solve_goal(goal, solver):
+    """在工作进程中为单个终点求出路由策略 {state: next_state}"""
+    if solver == "qlearning":
+        Q = q_learning_csr(_csr, None, goal, config=_config)
+        return goal, _csr.greedy_policy(Q)
+    if solver == "value_iteration":
+        return goal, _csr.greedy_policy(value_iteration(_csr, goal, gamma=1.0))
+    # dijkstra / astar 对“所有起点到同一终点”都等价于一棵反向最短路树
+    _, next_hop = shortest_path_tree(_graph, goal)
+    return goal, next_hop
+
+
+def precompute_policies(graph, goals, solver="dijkstra", max_workers=None, progress=None,
+                        config=None):
+    """
+    用进程池为每个终点并行计算路由策略（训练循环是 CPU 密集型，线程受 GIL 限制）。
+    :param progress: 可选回调 progress(done, total)
+    :param config: qlearning 使用的 LearningConfig，默认由工作进程读取配置文件
+    :return: {goal: {state: next_state}}
+    """
+    goals = list(goals)
+    max_workers = max_workers or os.cpu_count() or 1
+    policies = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(graph, config)) as pool:
+        futures = [pool.submit(_solve_goal, goal, solver) for goal in goals]
+        for done, future in enumerate(as_completed(futures), start=1):
+            goal, policy = future.result()
+            policies[goal] = policy
+            if progress is not None:
+                progress(done, len(goals))
+    return policies
+
+
+def follow_policy(policy, start, goal):
+    """沿策略表走到终点，遇到死点或循环时停止（与 extract_path 语义一致）"""
+    state = start
+    path = [state]
+    visited = set()
+    while state != goal:
+        visited.add(state)
+        action = policy.get(state)
+        if action is None or action in visited:
+            return path
+        path.append(action)
+        state = action
+    return path
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+
+class QTableCache:
+    """
+    训练好的 Q 表缓存，键为 (终点ID, 图版本)。
+    同一终点的 Q 表覆盖所有起点，因此只换起点时可直接复用。
+    按 LRU 顺序淘汰，同时限制条目数和总内存（按 Q 数组的 nbytes 计）。
+    图版本变化后，旧版本的表不再被 get 命中，但每个终点保留最新的一张作为热启动种子。
+    get / put 在工作线程调用，invalidate 在 GUI 线程调用，所有操作都持有同一把锁。
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (goal, version) -> Q 数组
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def get(self, goal, version):
+        """命中时返回 Q 数组并标记为最近使用，否则返回 None"""
+        key = (goal, version)
+        with self._lock:
+            Q = self._entries.get(key)
+            if Q is not None:
+                self._entries.move_to_end(key)
+            return Q
+
+    def put(self, goal, version, Q):
+        key = (goal, version)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if Q.nbytes > self.max_bytes:
+                return  # 单张表就超出预算，不缓存
+            self._entries[key] = Q
+            self._bytes += Q.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def get_seed(self, goal, current_version):
+        """返回该终点最新的过期 Q 表 (version, Q)，没有则返回 None"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == goal and k[1] < current_version]
+            if not stale:
+                return None
+            key = max(stale, key=lambda k: k[1])
+            return key[1], self._entries[key]
+
+    def invalidate(self, current_version):
+        """过期条目每个终点只保留版本最新的一张（用作热启动种子），其余丢弃"""
+        with self._lock:
+            newest = {}
+            for goal, version in self._entries:
+                if version != current_version and version > newest.get(goal, -1):
+                    newest[goal] = version
+            for key in [k for k in self._entries if k[1] != current_version and newest[k[0]] != k[1]]:
+                self._remove(key)
+
+    def oldest_version(self):
+        """缓存中最旧的图版本，缓存为空时返回 None"""
+        with self._lock:
+            return min((version for _, version in self._entries), default=None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        Q = self._entries.pop(key)
+        self._bytes -= Q.nbytes
@@ -1,94 +1,39 @@
-import configparser
-import os
 import random
+import time
 import numpy as np
 import math
-Flag = True
-
-# ================ 配置加载部分 ================
-
-def load_learning_config():
-    """加载 Q-learning 配置"""
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '../config/q_learning.ini')
-    
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"配置文件不存在：{config_path}")
-    
-    # 修改此处，明确指定编码格式
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config.read_file(f)  # 使用read_file替代read
-    
-    return {
-        'alpha': float(config['learning_parameters']['alpha']),
-        'gamma': float(config['learning_parameters']['gamma']),
-        'epsilon': float(config['learning_parameters']['epsilon']),
-        'episodes': int(config['learning_parameters']['episodes'])
-    }
-
-# 加载配置参数
-params = load_learning_config()
-if not Flag:
-    print("配置文件加载失败，使用默认参数")
-    alpha = 0.3
-    gamma = 0.95
-    epsilon = 0.5
-    episodes = 2000
-else:
-    alpha = params['alpha']
-    gamma = params['gamma']
-    epsilon = params['epsilon']
-    episodes = params['episodes']
+
+from . import bulk_loader
+from .learning_config import LearningConfig, get_config, load_learning_config
+
+# 像素距离到千米的换算系数
+DISTANCE_SCALE = 0.0048476868753
+
 
 def read_node_data(filename):
-    nodes = {}
-    with open(filename, 'r') as file:
-        for line in file:
-            parts = line.strip().split()
-            if len(parts) != 3:
-                print("Invalid node line:", line)
-                continue
-            node_id, lat, lon = int(parts[0]), float(parts[1]), float(parts[2])
-            nodes[node_id] = (lat, lon)
-    return nodes
+    """
+    读取节点数据（批量解析，格式错误的行汇总打印一次）
+    :return: 节点字典 {id: (x, y)}
+    """
+    report = bulk_loader.LoadReport(filename)
+    ids, coords = bulk_loader.load_nodes(filename, report)
+    report.print_summary()
+    return bulk_loader.node_dict(ids, coords)
 
 
 def read_edge_data(filename, nodes):
     """
     读取边数据，使用节点坐标计算欧几里得距离作为边长度
+    （批量解析并向量化计算边长，格式错误的行和缺少节点的边汇总打印一次）
     :param filename: 边数据文件路径
     :param nodes: 从read_node_data()返回的节点字典 {id: (lat, lon)}
     :return: 图结构 {start: {end: distance}}
     """
-    graph = {}
-    with open(filename, 'r') as file:
-        for line in file:
-            parts = line.strip().split()
-            if len(parts) != 4:  # 现在只需要edge_id, start, end
-                print("Invalid edge line:", line)
-                continue
-
-            edge_id, start, end ,correction= int(parts[0]), int(parts[1]), int(parts[2]), float(parts[3])
-
-            # 检查节点是否存在
-            if start not in nodes or end not in nodes:
-                print(f"Missing node coordinates for edge {edge_id}: {start}->{end}")
-                continue
-
-            # 获取节点坐标（经纬度）
-            lat1, lon1 = nodes[start]
-            lat2, lon2 = nodes[end]
-
-            # 计算欧几里得距离（简单差值）
-            # 注意：这不是真实地理距离，只是经纬度的算术差值
-            distance = math.sqrt((lat2 - lat1) ** 2 + (lon2 - lon1) ** 2)
-            distance *= 0.0048476868753
-            distance += correction
-            # 构建图结构（无向图）
-            graph.setdefault(start, {})[end] = distance
-            graph.setdefault(end, {})[start] = distance
-
-    return graph
+    report = bulk_loader.LoadReport(filename)
+    ids, coords = bulk_loader.node_arrays(nodes)
+    starts, ends, lengths = bulk_loader.load_edges(filename, ids, coords, DISTANCE_SCALE, report)
+    report.print_summary()
+    return bulk_loader.build_graph(starts, ends, lengths)
 
 
 # 初始化 Q 表
@@ -96,24 +41,210 @@ def initialize_Q(graph):
     return {state: {action: 0.0 for action in graph[state]} for state in graph}
 
 # ε-贪婪策略
-def epsilon_greedy(state, graph, Q):
+def epsilon_greedy(state, graph, Q, epsilon=None):
+    if epsilon is None:
+        epsilon = get_config().epsilon
     if random.uniform(0, 1) < epsilon:
         return random.choice(list(graph[state].keys()))
     else:
         return max(Q[state], key=Q[state].get)
 
+# 热启动：围绕变化边的局部重训练
+WARM_START_HOPS = 2            # 聚焦区域为变化边端点的 2 跳邻域
+WARM_START_MIN_FRACTION = 0.05  # 热启动至少运行冷启动轮次的 5%
+
+
+def focus_states(graph, changed_edges, hops=WARM_START_HOPS):
+    """返回变化边端点在 hops 跳以内的所有状态"""
+    frontier = {node for edge in changed_edges for node in edge if node in graph}
+    focus = set(frontier)
+    for _ in range(hops):
+        frontier = {v for u in frontier for v in graph.get(u, {})} - focus
+        focus |= frontier
+    return sorted(focus)
+
+
+def warm_start_episodes(num_focus, num_states, total_episodes=None):
+    """按聚焦区域占全图的比例缩减训练轮次"""
+    if total_episodes is None:
+        total_episodes = get_config().episodes
+    if num_states <= 0:
+        return total_episodes
+    fraction = max(WARM_START_MIN_FRACTION, min(1.0, num_focus / num_states))
+    return max(1, int(total_episodes * fraction))
+
+
+# 提前停止
+def stopping_settings(config: LearningConfig = None):
+    """当前配置下的提前停止参数"""
+    return (config or get_config()).stopping_settings()
+
+
+class EarlyStopping:
+    """
+    训练提前停止判定（参数默认取自配置文件，0 表示关闭对应条件）：
+    1. 连续 window 轮的最大 |ΔQ| 都低于 tolerance；
+    2. 每 check_interval 轮检查一次贪婪路径，连续 patience 次不变且能到达终点。
+    """
+
+    def __init__(self, greedy_path, goal, settings=None, config: LearningConfig = None):
+        """
+        :param greedy_path: 无参函数，返回当前贪婪路径
+        :param settings: 覆盖配置的停止参数，键同 stopping_settings()
+        :param config: 学习参数，默认为当前配置文件中的参数
+        """
+        settings = {**stopping_settings(config), **(settings or {})}
+        self.greedy_path = greedy_path
+        self.goal = goal
+        self.tolerance = settings['tolerance']
+        self.window = settings['window']
+        self.patience = settings['patience']
+        self.check_interval = max(1, settings['check_interval'])
+        self.reason = None
+        self._calm = 0
+        self._stable = 0
+        self._last_path = None
+        self._next_check = self.check_interval
+
+    def after_episodes(self, episodes_done, max_delta, count=1) -> bool:
+        """
+        :param episodes_done: 截至目前完成的总轮次
+        :param max_delta: 这 count 轮内的最大 |ΔQ|
+        :return: 是否应当停止训练
+        """
+        if self.tolerance > 0:
+            if max_delta < self.tolerance:
+                self._calm += count
+                if self._calm >= self.window:
+                    self.reason = "converged"
+                    return True
+            else:
+                self._calm = 0
+
+        if self.patience > 0 and episodes_done >= self._next_check:
+            self._next_check = episodes_done + self.check_interval
+            path = self.greedy_path()
+            if path == self._last_path and path[-1] == self.goal:
+                self._stable += 1
+                if self._stable >= self.patience:
+                    self.reason = "stable_path"
+                    return True
+            else:
+                self._stable = 0
+            self._last_path = path
+        return False
+
+    def stats(self, episodes_done, total_steps) -> dict:
+        """本次训练的统计信息"""
+        return {
+            'episodes': episodes_done,
+            'steps': total_steps,
+            'stop_reason': self.reason or "max_episodes",
+        }
+
+
+# 训练进度遥测
+class TrainingProgress:
+    """
+    每 interval 轮调用一次 callback(episode, total, steps, elapsed, max_delta, path_length)：
+        episode / total：已完成轮次 / 计划轮次
+        steps：累计步数；elapsed：已用秒数
+        max_delta：自上次报告以来的最大 |ΔQ|
+        path_length：当前贪婪路径的边数，未到达终点时为 -1
+    训练结束（含提前停止）时由 finish() 再报告一次，此时 episode 等于 total。
+    未设置回调时训练函数不创建该对象，循环内没有额外开销。
+    """
+
+    def __init__(self, callback, total, greedy_path, goal, interval):
+        """
+        :param greedy_path: 无参函数，返回当前贪婪路径；为 None 时 path_length 恒为 -1
+        """
+        self.callback = callback
+        self.total = total
+        self.greedy_path = greedy_path
+        self.goal = goal
+        self.interval = max(1, interval)
+        self._start = time.perf_counter()
+        self._next = self.interval
+        self._delta = 0.0
+        self._reported = (0, 0.0)  # 上次报告时的 (轮次, 最大 |ΔQ|)
+
+    def after_episodes(self, episodes_done, total_steps, max_delta):
+        if max_delta > self._delta:
+            self._delta = max_delta
+        if episodes_done >= self._next:
+            self._next = episodes_done + self.interval
+            self._report(episodes_done, self.total, total_steps)
+
+    def finish(self, episodes_done, total_steps):
+        if episodes_done == self._reported[0]:
+            self._delta = self._reported[1]  # 最后一轮刚报告过，沿用其读数
+        self._report(episodes_done, episodes_done, total_steps)
+
+    def _report(self, episodes_done, total, total_steps):
+        path_length = -1
+        if self.greedy_path is not None:
+            path = self.greedy_path()
+            if path[-1] == self.goal:
+                path_length = len(path) - 1
+        self.callback(episodes_done, total, total_steps,
+                      time.perf_counter() - self._start, self._delta, path_length)
+        self._reported = (episodes_done, self._delta)
+        self._delta = 0.0
+
+
 # Q-learning算法
-def q_learning(graph, start, goal):
-    Q = initialize_Q(graph)
-    for episode in range(episodes):
-        state = start
+def q_learning(graph, start, goal, Q=None, changed_edges=None, return_stats=False,
+               config: LearningConfig = None, progress=None, cancel=None):
+    """
+    :param Q: 已有的 Q 表，作为训练起点（不会被原地修改）
+    :param changed_edges: 自 Q 训练以来代价发生变化的边 [(u, v), ...]；
+        提供时只运行缩减后的轮次，奇数轮从变化边附近的状态出发
+    :param return_stats: 为 True 时返回 (Q, stats)，stats 含
+        episodes（实际轮次）、steps（总步数）、stop_reason（停止原因）
+    :param config: 本次训练使用的 LearningConfig，默认为当前配置文件中的参数
+    :param progress: 可选的进度回调，每 config.progress_interval 轮调用一次，
+        参数见 TrainingProgress
+    :param cancel: 可选的 CancelToken，每轮检查一次，取消后抛出 CalculationCancelled
+    """
+    config = config or get_config()
+    alpha, gamma, epsilon = config.alpha, config.gamma, config.epsilon
+    max_steps = config.max_steps
+    if Q is None:
+        Q = initialize_Q(graph)
+    else:
+        Q = {state: {action: Q.get(state, {}).get(action, 0.0) for action in graph[state]}
+             for state in graph}
+
+    n_episodes = config.episodes
+    focus = []
+    if changed_edges:
+        focus = [state for state in focus_states(graph, changed_edges) if state != goal]
+        n_episodes = warm_start_episodes(len(focus), len(graph), config.episodes)
+
+    greedy_path = lambda: extract_path(Q, start, goal, verbose=False)
+    stopper = EarlyStopping(greedy_path, goal, config=config)
+    reporter = None
+    if progress is not None:
+        reporter = TrainingProgress(progress, n_episodes, greedy_path, goal,
+                                    config.progress_interval)
+    total_steps = 0
+    episodes_done = 0
+    for episode in range(n_episodes):
+        if cancel is not None:
+            cancel.check()
+        state = random.choice(focus) if focus and episode % 2 else start
         visited = set()
+        steps = 0
+        episode_delta = 0.0
         while state != goal:
+            if max_steps and steps >= max_steps:
+                break  # 单轮步数上限
             visited.add(state)
             if state not in graph or not graph[state]:
                 break  # 死点
 
-            action = epsilon_greedy(state, graph, Q)
+            action = epsilon_greedy(state, graph, Q, epsilon)
             next_state = action
             # 原始奖励
             reward = -graph[state][action]
@@ -124,24 +255,42 @@ def q_learning(graph, start, goal):
 
             # Q-learning 更新
             max_q_next = max(Q[next_state].values()) if Q[next_state] else 0
-            Q[state][action] += alpha * (reward + gamma * max_q_next - Q[state][action])
+            delta = alpha * (reward + gamma * max_q_next - Q[state][action])
+            Q[state][action] += delta
+            if abs(delta) > episode_delta:
+                episode_delta = abs(delta)
 
+            steps += 1
             state = next_state
+
+        total_steps += steps
+        episodes_done = episode + 1
+        if reporter is not None:
+            reporter.after_episodes(episodes_done, total_steps, episode_delta)
+        if stopper.after_episodes(episodes_done, episode_delta):
+            break
+
+    if reporter is not None:
+        reporter.finish(episodes_done, total_steps)
+    if return_stats:
+        return Q, stopper.stats(episodes_done, total_steps)
     return Q
 
 
-def extract_path(Q, start, goal):
+def extract_path(Q, start, goal, verbose=True):
     state = start
     path = [state]
     visited = set()
     while state != goal:
         visited.add(state)
         if state not in Q or not Q[state]:
-            print(f"在节点 {state} 停止：没有可选动作。")
+            if verbose:
+                print(f"在节点 {state} 停止：没有可选动作。")
             return path
         action = max(Q[state], key=Q[state].get)
         if action in visited:
-            print(f"检测到循环路径，停在 {action}")
+            if verbose:
+                print(f"检测到循环路径，停在 {action}")
             return path
         path.append(action)
         state = action
@@ -0,0 +1,262 @@
+import random
+
+import numpy as np
+
+from . import q_learning as base
+from .csr_graph import CSRGraph
+from .learning_config import LearningConfig, get_config
+
+
+def _warm_start(csr: CSRGraph, goal, Q, changed_edges, config: LearningConfig):
+    """整理热启动参数：返回 (初始 Q 数组, 聚焦状态下标列表, 训练轮次)"""
+    Q = csr.zeros_q() if Q is None else np.array(Q, dtype=np.float64)
+    if not changed_edges:
+        return Q, [], config.episodes
+    # focus_states 只需要邻居列表
+    node_ids, indptr, indices = csr.node_ids, csr.indptr.tolist(), csr.indices.tolist()
+    graph = {node_ids[i]: [node_ids[j] for j in indices[indptr[i]:indptr[i + 1]]]
+             for i in range(csr.num_nodes)}
+    focus = [csr.index[s] for s in base.focus_states(graph, changed_edges) if s != goal]
+    return Q, focus, base.warm_start_episodes(len(focus), csr.num_nodes, config.episodes)
+
+
+# 基于 CSR 数组的 Q-learning 引擎
+def q_learning_csr(csr: CSRGraph, start, goal, Q=None, changed_edges=None,
+                   return_stats=False, config: LearningConfig = None, progress=None,
+                   cancel=None):
+    """
+    与 q_learning.q_learning 等价的训练过程，但 Q 表是按 CSR 顺序排列的扁平数组。
+    随机数的消耗顺序与 dict 版完全一致，因此相同随机种子下得到的 Q 值（以及
+    extract_path 的结果）逐位相同。
+    :param Q: 已有的扁平 Q 数组，作为训练起点（不会被原地修改）
+    :param changed_edges: 自 Q 训练以来代价变化的边，用法同 q_learning.q_learning
+    :param return_stats: 为 True 时返回 (Q, stats)，stats 同 q_learning.q_learning
+    :param start: 为 None 时使用随机起点（exploring starts），每轮从任一非终点状态出发，
+        训练出覆盖所有起点的策略；此时不做贪婪路径稳定性检查
+    :param config: 本次训练使用的 LearningConfig，默认为当前配置文件中的参数
+    :param progress: 可选的进度回调，用法同 q_learning.q_learning
+    :param cancel: 可选的 CancelToken，用法同 q_learning.q_learning
+    :return: 长度为 csr.num_edges 的 numpy Q 数组
+    """
+    config = config or get_config()
+    Q, focus, n_episodes = _warm_start(csr, goal, Q, changed_edges, config)
+    if goal not in csr.index:
+        raise KeyError(f"终点 {goal} 不在图中")
+    exploring = start is None
+    if exploring:
+        focus = [i for i in range(csr.num_nodes) if i != csr.index[goal]]
+    elif start not in csr.index:
+        # 起点是死点，每轮都会立即结束
+        stats = {'episodes': n_episodes, 'steps': 0, 'stop_reason': "max_episodes"}
+        return (Q, stats) if return_stats else Q
+
+    alpha, gamma, epsilon = config.alpha, config.gamma, config.epsilon
+    max_steps = config.max_steps
+    indptr = csr.indptr.tolist()
+    indices = csr.indices.tolist()
+    reward = [-w for w in csr.weights.tolist()]
+    n = csr.num_nodes
+
+    # 内层循环只操作 Python 列表和整数偏移，避免 dict 哈希和 numpy 标量开销
+    q = Q.tolist()
+    # 每个状态当前的最大 Q 值，增量维护，避免每步 max(...)
+    row_max = [max(q[indptr[i]:indptr[i + 1]], default=0.0) for i in range(n)]
+    # 用“轮次戳”代替每轮新建的 visited 集合
+    seen = [-1] * n
+
+    rand = random.random
+    randrange = random.randrange
+    start_i = None if exploring else csr.index[start]
+    goal_i = csr.index[goal]
+
+    greedy_path = None if exploring else lambda: csr.extract_path(q, start, goal, verbose=False)
+    stopper = base.EarlyStopping(
+        greedy_path, goal, settings={'patience': 0} if exploring else None, config=config)
+    reporter = None
+    if progress is not None:
+        reporter = base.TrainingProgress(progress, n_episodes, greedy_path, goal,
+                                         config.progress_interval)
+    total_steps = 0
+    episodes_done = 0
+    for episode in range(n_episodes):
+        if cancel is not None:
+            cancel.check()
+        state = random.choice(focus) if focus and (exploring or episode % 2) else start_i
+        if state is None:
+            break  # 只有终点一个状态
+        steps = 0
+        episode_delta = 0.0
+        while state != goal_i:
+            if max_steps and steps >= max_steps:
+                break  # 单轮步数上限
+            seen[state] = episode
+            lo = indptr[state]
+            hi = indptr[state + 1]
+            if lo == hi:
+                break  # 死点
+
+            # ε-贪婪（与 random.uniform(0, 1) / random.choice 消耗相同的随机数）
+            if rand() < epsilon:
+                k = lo + randrange(hi - lo)
+            else:
+                k = q.index(row_max[state], lo, hi)
+            next_state = indices[k]
+
+            r = reward[k]
+            if seen[next_state] == episode:
+                r -= 10
+
+            old = q[k]
+            delta = alpha * (r + gamma * row_max[next_state] - old)
+            new = old + delta
+            q[k] = new
+            if new >= row_max[state]:
+                row_max[state] = new
+            elif old == row_max[state]:
+                row_max[state] = max(q[lo:hi])
+            if delta > episode_delta or -delta > episode_delta:
+                episode_delta = abs(delta)
+
+            steps += 1
+            state = next_state
+
+        total_steps += steps
+        episodes_done = episode + 1
+        if reporter is not None:
+            reporter.after_episodes(episodes_done, total_steps, episode_delta)
+        if stopper.after_episodes(episodes_done, episode_delta):
+            break
+
+    if reporter is not None:
+        reporter.finish(episodes_done, total_steps)
+    Q[:] = q
+    if return_stats:
+        return Q, stopper.stats(episodes_done, total_steps)
+    return Q
+
+
+# 多智能体同步（向量化）Q-learning
+def q_learning_batched(csr: CSRGraph, start, goal, batch_size=64, seed=None,
+                       Q=None, changed_edges=None, return_stats=False,
+                       config: LearningConfig = None, progress=None, cancel=None):
+    """
+    让 batch_size 个相互独立的智能体同步前进，每一步用 numpy 向量完成
+    ε-贪婪选择、奖励查询、重复访问惩罚和 TD 更新，并把本步的更新合并进共享 Q 表。
+    多个智能体在同一步更新同一条边时取平均增量，避免学习率被放大。
+    训练总轮次、alpha、gamma、epsilon 取自 config（默认为 config/q_learning.ini）。
+    Q / changed_edges 的热启动用法、return_stats 的返回值、progress 回调和 cancel
+    同 q_learning_csr（cancel 每个同步步检查一次）。
+    :return: 长度为 csr.num_edges 的 numpy Q 数组
+    """
+    config = config or get_config()
+    Q, focus, total = _warm_start(csr, goal, Q, changed_edges, config)
+    if goal not in csr.index:
+        raise KeyError(f"终点 {goal} 不在图中")
+    if start not in csr.index or total <= 0:
+        stats = {'episodes': total, 'steps': 0, 'stop_reason': "max_episodes"}
+        return (Q, stats) if return_stats else Q
+    focus = np.asarray(focus, dtype=np.int64)
+
+    alpha, gamma, epsilon = config.alpha, config.gamma, config.epsilon
+    max_steps = config.max_steps
+    rng = np.random.default_rng(seed)
+    slots = csr.padded_slots()
+    valid = slots >= 0
+    degrees = csr.degrees
+    indptr = csr.indptr
+    indices = csr.indices
+    reward = -csr.weights
+    start_i = csr.index[start]
+    goal_i = csr.index[goal]
+
+    n_agents = max(1, min(batch_size, total))
+
+    def initial_states(episode_ids):
+        # 热启动时奇数轮从聚焦区域随机出发
+        states = np.full(len(episode_ids), start_i, dtype=np.int64)
+        if len(focus):
+            odd = episode_ids % 2 == 1
+            states[odd] = focus[rng.integers(len(focus), size=int(odd.sum()))]
+        return states
+
+    state = initial_states(np.arange(n_agents))
+    active = np.ones(n_agents, dtype=bool)
+    visited = np.zeros((n_agents, csr.num_nodes), dtype=bool)
+    steps = np.zeros(n_agents, dtype=np.int64)
+    launched = n_agents
+    finished = 0
+    total_steps = 0
+    pending_delta = 0.0  # 上次有轮次结束以来的最大 |ΔQ|
+    greedy_path = lambda: csr.extract_path(Q, start, goal, verbose=False)
+    stopper = base.EarlyStopping(greedy_path, goal, config=config)
+    reporter = None
+    if progress is not None:
+        reporter = base.TrainingProgress(progress, total, greedy_path, goal,
+                                         config.progress_interval)
+
+    def row_max(states):
+        values = np.where(valid[states], Q[slots[states]], -np.inf)
+        best = values.max(axis=1) if values.shape[1] else np.zeros(len(states))
+        best[degrees[states] == 0] = 0.0  # 死点的 max Q 记为 0
+        return best
+
+    while finished < total:
+        if cancel is not None:
+            cancel.check()
+        agents = np.flatnonzero(active)
+        s = state[agents]
+        visited[agents, s] = True
+
+        # 已在终点、处于死点或达到步数上限的智能体直接结束本轮
+        alive = (degrees[s] > 0) & (s != goal_i)
+        if max_steps:
+            alive &= steps[agents] < max_steps
+        ended = agents[~alive]
+        agents, s = agents[alive], s[alive]
+
+        if len(agents):
+            m = len(agents)
+            # ε-贪婪：argmax 取第一个最大值，与单智能体版的平局处理一致
+            row_q = np.where(valid[s], Q[slots[s]], -np.inf)
+            greedy = slots[s, row_q.argmax(axis=1)]
+            explore = rng.random(m) < epsilon
+            random_k = indptr[s] + (rng.random(m) * degrees[s]).astype(np.int64)
+            k = np.where(explore, random_k, greedy)
+            next_state = indices[k]
+
+            r = reward[k] - 10.0 * visited[agents, next_state]
+            delta = alpha * (r + gamma * row_max(next_state) - Q[k])
+
+            # 合并同一步内对同一条边的多次更新
+            unique_k, inverse = np.unique(k, return_inverse=True)
+            merged = np.bincount(inverse, weights=delta) / np.bincount(inverse)
+            Q[unique_k] += merged
+            pending_delta = max(pending_delta, float(np.abs(merged).max()))
+
+            steps[agents] += 1
+            total_steps += m
+            state[agents] = next_state
+            ended = np.concatenate([ended, agents[next_state == goal_i]])
+
+        if len(ended):
+            finished += len(ended)
+            # 还有剩余轮次的智能体从起点重新开始，否则退出
+            restart = ended[:max(0, min(len(ended), total - launched))]
+            retire = ended[len(restart):]
+            state[restart] = initial_states(np.arange(launched, launched + len(restart)))
+            launched += len(restart)
+            steps[restart] = 0
+            visited[restart] = False
+            active[retire] = False
+
+            if reporter is not None:
+                reporter.after_episodes(min(finished, total), total_steps, pending_delta)
+            if stopper.after_episodes(finished, pending_delta, count=len(ended)):
+                break
+            pending_delta = 0.0
+
+    if reporter is not None:
+        reporter.finish(min(finished, total), total_steps)
+    if return_stats:
+        return Q, stopper.stats(min(finished, total), total_steps)
+    return Q
@@ -0,0 +1,92 @@
+import heapq
+import math
+
+from .q_learning import DISTANCE_SCALE
+
+
+def _reconstruct(parents, start, goal):
+    path = [goal]
+    while path[-1] != start:
+        path.append(parents[path[-1]])
+    path.reverse()
+    return path
+
+
+def dijkstra(graph, start, goal):
+    """
+    精确最短路径（Dijkstra）
+    :param graph: {start: {end: distance}}
+    :return: 节点 ID 列表；不可达时抛出 ValueError
+    """
+    return astar(graph, None, start, goal)
+
+
+def astar(graph, nodes, start, goal):
+    """
+    A* 最短路径，启发函数为节点坐标间的欧几里得距离（换算为千米）。
+    边长 = 坐标距离 × DISTANCE_SCALE + 修正值，只要修正值非负、惩罚倍数不小于 1，
+    该启发函数就是可采纳的，结果与 Dijkstra 相同。
+    :param nodes: {id: (x, y)}；为 None 时退化为 Dijkstra
+    """
+    if start not in graph:
+        raise ValueError(f"起点 {start} 不在图中")
+    if start == goal:
+        return [start]
+
+    if nodes is None or goal not in nodes:
+        def heuristic(_):
+            return 0.0
+    else:
+        gx, gy = nodes[goal]
+
+        def heuristic(node_id):
+            x, y = nodes[node_id]
+            return math.sqrt((x - gx) ** 2 + (y - gy) ** 2) * DISTANCE_SCALE
+
+    dist = {start: 0.0}
+    parents = {}
+    closed = set()
+    heap = [(heuristic(start), 0.0, start)]
+    while heap:
+        _, d, u = heapq.heappop(heap)
+        if u in closed:
+            continue
+        if u == goal:
+            return _reconstruct(parents, start, goal)
+        closed.add(u)
+        for v, w in graph.get(u, {}).items():
+            nd = d + w
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                parents[v] = u
+                heapq.heappush(heap, (nd + heuristic(v), nd, v))
+
+    raise ValueError(f"从节点 {start} 无法到达节点 {goal}")
+
+
+def shortest_path_tree(graph, goal):
+    """
+    从终点出发沿反向边运行 Dijkstra，得到所有节点到终点的最短路树。
+    :return: (dist, next_hop)，next_hop[u] 为 u 走向终点的下一个节点
+    """
+    reverse = {}
+    for u, neighbors in graph.items():
+        for v, w in neighbors.items():
+            reverse.setdefault(v, []).append((u, w))
+
+    dist = {goal: 0.0}
+    next_hop = {}
+    closed = set()
+    heap = [(0.0, goal)]
+    while heap:
+        d, v = heapq.heappop(heap)
+        if v in closed:
+            continue
+        closed.add(v)
+        for u, w in reverse.get(v, ()):
+            nd = d + w
+            if nd < dist.get(u, math.inf):
+                dist[u] = nd
+                next_hop[u] = v
+                heapq.heappush(heap, (nd, u))
+    return dist, next_hop
@@ -0,0 +1,227 @@
+"""
+均匀网格空间索引：把节点（或边）按所在网格单元排序存放，查询时只检查查询范围覆盖的单元。
+    NodeIndex：鼠标悬停高亮、点击吸附等“离某点最近的节点”查询；
+    EdgeIndex：惩罚区域等“与某个圆相交的边”查询。
+"""
+import math
+
+import numpy as np
+
+
+def _gather(cell_start, nx: int, ix0: int, ix1: int, iy0: int, iy1: int):
+    """网格单元矩形 [ix0, ix1] × [iy0, iy1] 内的条目：每一行对应排序数组中的一段连续切片"""
+    if ix0 > ix1 or iy0 > iy1:
+        return np.zeros(0, dtype=np.int64)
+    slices = [np.arange(cell_start[row * nx + ix0], cell_start[row * nx + ix1 + 1])
+              for row in range(iy0, iy1 + 1)]
+    return np.concatenate(slices)
+
+
+class NodeIndex:
+    """
+    均匀网格索引。节点按网格单元（行优先）排序，每个单元的节点在排序数组中连续，
+    因此查询矩形内同一行的若干单元对应一段连续切片。
+    距离相同时按节点在原字典中的顺序取先出现者，与逐个扫描 nodes 的结果一致。
+    """
+
+    PER_CELL = 2  # 每个网格单元的平均节点数
+    MIN_CELL = 1.0  # 网格单元的最小边长（坐标为像素）
+
+    def __init__(self, node_ids, coords, per_cell: int = PER_CELL):
+        """
+        :param node_ids: 节点 ID 数组
+        :param coords: 与 node_ids 对应的 (n, 2) 坐标
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        n = len(node_ids)
+        if n:
+            self.origin = coords.min(axis=0)
+            extent = np.maximum(coords.max(axis=0) - self.origin, 1e-9)
+            self.cell_size = max(math.sqrt(extent[0] * extent[1] * per_cell / n),
+                                 float(extent.max()) / n, self.MIN_CELL)
+        else:
+            self.origin = np.zeros(2)
+            extent = np.ones(2)
+            self.cell_size = 1.0
+        self.nx = int(extent[0] // self.cell_size) + 1
+        self.ny = int(extent[1] // self.cell_size) + 1
+
+        cell = self._cell_of(coords)
+        order = np.argsort(cell[:, 1] * self.nx + cell[:, 0], kind='stable')
+        self.rank = order  # 排序位置 -> 原顺序下标（用于平局时按原顺序取舍）
+        self.node_ids = node_ids[order]
+        self.coords = coords[order]
+        counts = np.bincount(cell[order, 1] * self.nx + cell[order, 0], minlength=self.nx * self.ny)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_nodes(cls, nodes: dict):
+        """由 {id: (x, y)} 字典构建"""
+        ids = np.fromiter(nodes.keys(), dtype=np.int64, count=len(nodes))
+        coords = np.asarray(list(nodes.values()), dtype=np.float64).reshape(-1, 2)
+        return cls(ids, coords)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def _cell_of(self, coords):
+        cell = np.floor((coords - self.origin) / self.cell_size).astype(np.int64)
+        cell[:, 0] = np.clip(cell[:, 0], 0, self.nx - 1)
+        cell[:, 1] = np.clip(cell[:, 1], 0, self.ny - 1)
+        return cell
+
+    def _candidates(self, x: float, y: float, radius: float):
+        """与以 (x, y) 为中心、边长 2*radius 的正方形相交的单元中的节点（排序位置）"""
+        if not math.isfinite(radius):
+            return np.arange(len(self))
+        ix0 = max(int((x - radius - self.origin[0]) // self.cell_size), 0)
+        ix1 = min(int((x + radius - self.origin[0]) // self.cell_size), self.nx - 1)
+        iy0 = max(int((y - radius - self.origin[1]) // self.cell_size), 0)
+        iy1 = min(int((y + radius - self.origin[1]) // self.cell_size), self.ny - 1)
+        return _gather(self.cell_start, self.nx, ix0, ix1, iy0, iy1)
+
+    def _sorted_within(self, x: float, y: float, radius: float):
+        """距离小于 radius 的节点（排序位置）及其距离平方，按距离、原顺序升序"""
+        idx = self._candidates(x, y, radius)
+        d2 = (self.coords[idx, 0] - x) ** 2 + (self.coords[idx, 1] - y) ** 2
+        inside = d2 < radius * radius
+        idx, d2 = idx[inside], d2[inside]
+        order = np.lexsort((self.rank[idx], d2))
+        return idx[order], d2[order]
+
+    def within(self, x: float, y: float, radius: float) -> list:
+        """距离小于 radius 的所有节点 ID，按距离升序"""
+        idx, _ = self._sorted_within(x, y, radius)
+        return self.node_ids[idx].tolist()
+
+    def k_nearest(self, x: float, y: float, k: int, radius: float = math.inf) -> list:
+        """
+        最近的 k 个节点 [(id, 距离)]，按距离升序。
+        :param radius: 只返回距离小于 radius 的节点
+        """
+        if k <= 0 or not len(self):
+            return []
+        k = min(k, len(self))
+        # 搜索半径逐步翻倍，直到半径内已有 k 个节点（半径内的结果是精确的）
+        search = self.cell_size
+        while True:
+            limit = min(search, radius)
+            idx, d2 = self._sorted_within(x, y, limit)
+            if len(idx) >= k or limit >= radius or self._covers_all(x, y, limit):
+                idx, d2 = idx[:k], d2[:k]
+                return list(zip(self.node_ids[idx].tolist(), np.sqrt(d2).tolist()))
+            search *= 2
+
+    def nearest(self, x: float, y: float, radius: float = math.inf):
+        """最近节点 ID；radius 内没有节点时返回 None"""
+        result = self.k_nearest(x, y, 1, radius)
+        return result[0][0] if result else None
+
+    def _covers_all(self, x: float, y: float, radius: float) -> bool:
+        """半径是否已超出所有节点的范围"""
+        far_x = max(abs(x - self.origin[0]), abs(x - self.origin[0] - self.nx * self.cell_size))
+        far_y = max(abs(y - self.origin[1]), abs(y - self.origin[1] - self.ny * self.cell_size))
+        return radius * radius > far_x * far_x + far_y * far_y
+
+
+class EdgeIndex:
+    """
+    边（线段）的均匀网格索引：每条边登记在其包围盒覆盖的所有网格单元中。
+    圆形区域查询先取圆的包围盒覆盖的单元中的候选边，再做精确的线段–圆相交判断，
+    因此穿过圆但中点在圆外的长边也能找到。边的结构（不含边权）在加载数据后不变。
+    """
+
+    PER_CELL = 4  # 每个网格单元平均登记的边数
+    MIN_CELL = 1.0
+
+    def __init__(self, sources, targets, start_coords, end_coords, per_cell: int = PER_CELL):
+        """
+        :param sources: 每条有向边的起点 ID
+        :param targets: 每条有向边的终点 ID
+        :param start_coords: 起点坐标 (m, 2)
+        :param end_coords: 终点坐标 (m, 2)
+        """
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.p1 = np.asarray(start_coords, dtype=np.float64).reshape(-1, 2)
+        self.p2 = np.asarray(end_coords, dtype=np.float64).reshape(-1, 2)
+        m = len(self.sources)
+        lo = np.minimum(self.p1, self.p2)
+        hi = np.maximum(self.p1, self.p2)
+        if m:
+            self.origin = lo.min(axis=0)
+            extent = np.maximum(hi.max(axis=0) - self.origin, 1e-9)
+            # 单元至少与边的平均包围盒一样大，避免长边登记到过多单元
+            self.cell_size = max(math.sqrt(extent[0] * extent[1] * per_cell / m),
+                                 float((hi - lo).mean()), self.MIN_CELL)
+        else:
+            self.origin = np.zeros(2)
+            extent = np.ones(2)
+            self.cell_size = 1.0
+        self.nx = int(extent[0] // self.cell_size) + 1
+        self.ny = int(extent[1] // self.cell_size) + 1
+
+        # 展开每条边覆盖的单元 (edge, cell)，按单元排序
+        c0 = np.floor((lo - self.origin) / self.cell_size).astype(np.int64)
+        c1 = np.floor((hi - self.origin) / self.cell_size).astype(np.int64)
+        c0[:, 0] = np.clip(c0[:, 0], 0, self.nx - 1)
+        c1[:, 0] = np.clip(c1[:, 0], 0, self.nx - 1)
+        c0[:, 1] = np.clip(c0[:, 1], 0, self.ny - 1)
+        c1[:, 1] = np.clip(c1[:, 1], 0, self.ny - 1)
+        width = c1[:, 0] - c0[:, 0] + 1
+        count = width * (c1[:, 1] - c0[:, 1] + 1)
+        edge = np.repeat(np.arange(m, dtype=np.int64), count)
+        local = np.arange(len(edge), dtype=np.int64) - np.repeat(np.cumsum(count) - count, count)
+        cx = c0[edge, 0] + local % width[edge]
+        cy = c0[edge, 1] + local // width[edge]
+        cell = cy * self.nx + cx
+        order = np.argsort(cell, kind='stable')
+        self.entries = edge[order]  # 按单元排序的边下标
+        counts = np.bincount(cell, minlength=self.nx * self.ny)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_csr(cls, csr, nodes: dict):
+        """
+        由 CSRGraph 和 {id: (x, y)} 构建，边的顺序与遍历 graph 字典的顺序一致。
+        缺少坐标的端点对应的边不登记。
+        """
+        ids = np.asarray(csr.node_ids, dtype=np.int64)
+        has = np.fromiter((node_id in nodes for node_id in csr.node_ids), dtype=bool, count=len(ids))
+        coords = np.zeros((len(ids), 2))
+        if has.any():
+            coords[has] = [nodes[node_id] for node_id in ids[has].tolist()]
+        rows = np.repeat(np.arange(len(ids), dtype=np.int64), np.diff(csr.indptr))
+        cols = np.asarray(csr.indices, dtype=np.int64)
+        keep = has[rows] & has[cols]
+        rows, cols = rows[keep], cols[keep]
+        return cls(ids[rows], ids[cols], coords[rows], coords[cols])
+
+    def __len__(self):
+        return len(self.sources)
+
+    def intersecting_circle(self, center: tuple, radius: float) -> list:
+        """
+        与圆（含边界）相交的有向边 [(u, v)]，按索引中的边顺序。
+        """
+        if not len(self) or radius < 0:
+            return []
+        x, y = center
+        ix0 = max(int((x - radius - self.origin[0]) // self.cell_size), 0)
+        ix1 = min(int((x + radius - self.origin[0]) // self.cell_size), self.nx - 1)
+        iy0 = max(int((y - radius - self.origin[1]) // self.cell_size), 0)
+        iy1 = min(int((y + radius - self.origin[1]) // self.cell_size), self.ny - 1)
+        candidates = np.unique(self.entries[_gather(self.cell_start, self.nx, ix0, ix1, iy0, iy1)])
+
+        # 圆心到线段的最近点：投影参数截断到 [0, 1]
+        p1 = self.p1[candidates]
+        d = self.p2[candidates] - p1
+        rel = np.array([x, y]) - p1
+        length_sq = (d * d).sum(axis=1)
+        t = np.divide((rel * d).sum(axis=1), length_sq,
+                      out=np.zeros(len(candidates)), where=length_sq > 0)
+        t = np.clip(t, 0.0, 1.0)
+        offset = rel - t[:, None] * d
+        hit = candidates[(offset * offset).sum(axis=1) <= radius * radius]
+        return list(zip(self.sources[hit].tolist(), self.targets[hit].tolist()))
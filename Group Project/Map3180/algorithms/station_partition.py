@@ -0,0 +1,119 @@
+"""
+按道路距离的充电站 Voronoi 划分：从所有充电站同时沿反向边运行一次多源 Dijkstra，
+为每个节点记录最近的充电站、到它的距离，以及走向它的下一跳。
+之后“找最近充电站”只需查表，路径沿下一跳走即可，代价与路径长度成正比。
+边权变化（事件覆盖层增删）后只重新标记受影响的节点，而不是整体重算。
+"""
+import heapq
+import math
+
+
+class StationPartition:
+    """
+    多源最短路森林：每棵树以一个充电站为根。
+        station[u]  离 u 最近（道路距离）的充电站
+        dist[u]     u 到该充电站的最短距离
+        next_hop[u] u 走向该充电站的下一个节点（充电站本身没有）
+    """
+
+    def __init__(self, graph, station_ids):
+        """
+        :param graph: {start: {end: distance}}，只读取，不修改
+        :param station_ids: 充电站节点 ID；不在图中的忽略
+        """
+        self.station_ids = tuple(station_ids)
+        self.version = None  # 由调用方记录对应的图版本
+        # 反向邻接只依赖图结构；边权在松弛时从 graph 读取
+        self._reverse = {}
+        for u, neighbors in graph.items():
+            for v in neighbors:
+                self._reverse.setdefault(v, []).append(u)
+        self.dist = {}
+        self.station = {}
+        self.next_hop = {}
+        self._children = {}  # v -> {u: next_hop[u] == v}，用于找出受影响的子树
+        heap = []
+        for s in self.station_ids:
+            if s in graph or s in self._reverse:
+                self.dist[s] = 0.0
+                self.station[s] = s
+                heap.append((0.0, s))
+        heapq.heapify(heap)
+        self._propagate(graph, heap)
+
+    def nearest(self, node_id):
+        """离 node_id 最近的充电站；无法到达任何充电站时返回 None"""
+        return self.station.get(node_id)
+
+    def distance(self, node_id) -> float:
+        return self.dist.get(node_id, math.inf)
+
+    def path(self, node_id) -> list:
+        """从 node_id 沿下一跳走到最近充电站的节点路径；无法到达时抛出 ValueError"""
+        if node_id not in self.station:
+            raise ValueError(f"节点 {node_id} 无法到达任何充电站")
+        path = [node_id]
+        while path[-1] in self.next_hop:
+            path.append(self.next_hop[path[-1]])
+        return path
+
+    def update(self, graph, changed_edges):
+        """
+        边权变化后增量地重新标记。
+        :param changed_edges: 代价发生变化的有向边 [(u, v), ...]
+        :return: 距离或所属充电站被重新计算的节点数
+        """
+        # 1. 代价变化的树边 u -> next_hop[u]：u 及其整棵子树的距离失效
+        invalid = set()
+        stack = [u for u, v in changed_edges if self.next_hop.get(u) == v]
+        while stack:
+            u = stack.pop()
+            if u in invalid:
+                continue
+            invalid.add(u)
+            stack.extend(self._children.get(u, ()))
+        for u in invalid:
+            self._set_parent(u, None)
+            self.dist.pop(u, None)
+            self.station.pop(u, None)
+
+        # 2. 失效节点从仍然有效的邻居重新取最优值；非树边变便宜时也可能改善起点
+        heap = []
+        for u in invalid:
+            for v, w in graph.get(u, {}).items():
+                if v not in invalid and v in self.dist:
+                    self._relax(heap, u, v, self.dist[v] + w)
+        for u, v in changed_edges:
+            if u not in invalid and v in self.dist and v in graph.get(u, {}):
+                self._relax(heap, u, v, self.dist[v] + graph[u][v])
+
+        # 3. 从这些节点继续 Dijkstra，只扩展到距离确实变小的节点
+        return len(invalid | self._propagate(graph, heap))
+
+    def _relax(self, heap, u, v, d):
+        """u 经 v 走向充电站的距离为 d，比当前更短时更新"""
+        if d < self.dist.get(u, math.inf):
+            self.dist[u] = d
+            self.station[u] = self.station[v]
+            self._set_parent(u, v)
+            heapq.heappush(heap, (d, u))
+
+    def _propagate(self, graph, heap) -> set:
+        """Dijkstra 主循环，返回本次确定了距离的节点"""
+        settled = set()
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > self.dist.get(v, math.inf):
+                continue
+            settled.add(v)
+            for u in self._reverse.get(v, ()):
+                self._relax(heap, u, v, d + graph[u][v])
+        return settled
+
+    def _set_parent(self, u, v):
+        old = self.next_hop.pop(u, None)
+        if old is not None:
+            self._children[old].discard(u)
+        if v is not None:
+            self.next_hop[u] = v
+            self._children.setdefault(v, set()).add(u)
@@ -0,0 +1,65 @@
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .learning_config import get_config
+
+# 值迭代的收敛阈值与最大扫描次数
+VI_TOLERANCE = 1e-9
+VI_MAX_SWEEPS = 10000
+
+
+def value_iteration(csr: CSRGraph, goal, gamma=None, tol=VI_TOLERANCE,
+                    max_sweeps=VI_MAX_SWEEPS, return_stats=False, cancel=None):
+    """
+    基于模型的同步值迭代（Bellman-Ford 式全状态扫描）。
+    环境是确定性的：graph[state][action] 直接给出转移和奖励，因此
+        Q(s, a) = -w(s, a) + gamma * V(a)，V(s) = max_a Q(s, a)，V(goal) = 0
+    每次扫描都是整张图上的向量化运算，通常几十次扫描即可收敛。
+    gamma 取 1 时等价于 Bellman-Ford，贪婪策略即精确最短路；取配置中的折扣因子时
+    得到与 Q-learning 相同目标下的最优 Q 表。
+    重复访问惩罚依赖历史轨迹、不属于马尔可夫奖励，这里不建模。
+    :return: 扁平 Q 数组（可用 csr.extract_path，或经 csr.q_to_dict 后交给
+        q_learning.extract_path），return_stats 为 True 时返回 (Q, stats)，
+        stats 含 sweeps（扫描次数）和 stop_reason
+    :param cancel: 可选的 CancelToken，每次扫描前检查，取消后抛出 CalculationCancelled
+    """
+    if goal not in csr.index:
+        raise KeyError(f"终点 {goal} 不在图中")
+    gamma = get_config().gamma if gamma is None else gamma
+
+    n = csr.num_nodes
+    goal_i = csr.index[goal]
+    reward = -csr.weights
+    indices = csr.indices
+    has_actions = csr.degrees > 0
+    starts = csr.indptr[:-1][has_actions]
+
+    # 悲观初始化：只有终点的价值已知，价值逐层从终点向外传播，
+    # 扫描次数约等于最短路的最大跳数；到不了终点的状态保持 -inf
+    V = np.full(n, -np.inf, dtype=np.float64)
+    V[goal_i] = 0.0
+    Q = reward + gamma * V[indices]
+    sweeps = 0
+    reason = "max_sweeps"
+    while sweeps < max_sweeps:
+        if cancel is not None:
+            cancel.check()
+        sweeps += 1
+        new_V = np.full(n, -np.inf, dtype=np.float64)
+        if len(starts):
+            new_V[has_actions] = np.maximum.reduceat(Q, starts)
+        new_V[goal_i] = 0.0  # 终点是吸收态
+        finite = np.isfinite(new_V)
+        if np.array_equal(finite, np.isfinite(V)):
+            delta = np.abs(new_V[finite] - V[finite]).max(initial=0.0)
+        else:
+            delta = np.inf  # 本次扫描有新状态连通到终点
+        V = new_V
+        Q = reward + gamma * V[indices]
+        if delta < tol:
+            reason = "converged"
+            break
+
+    if return_stats:
+        return Q, {'sweeps': sweeps, 'stop_reason': reason}
+    return Q
@@ -0,0 +1,266 @@
+"""
+路由与数据加载热点路径的基准测试（无界面运行，需要 MapCanvas 时使用 Qt offscreen 平台）。
+
+在 Map3180 目录下运行：
+    python -m benchmarks                              # 自带数据 + 1k/10k/100k 节点合成路网
+    python -m benchmarks --topology city              # 合成路网改用城区拓扑（见 benchmarks/synthetic.py）
+    python -m benchmarks --sizes 1000 --repeat 3      # 只测 1k 节点
+    python -m benchmarks --compare old.json new.json  # 比较两次提交的结果
+结果写成 JSON（默认 benchmarks/results/bench_<提交>_<时间>.json）。
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import contextlib
+import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from algorithms.csr_graph import CSRGraph
+from algorithms.learning_config import get_config
+from algorithms.path_service import PathService
+from algorithms.q_learning import read_node_data, read_edge_data, q_learning, extract_path
+from algorithms.q_learning_csr import q_learning_csr
+from benchmarks.synthetic import TOPOLOGIES, generate_network
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_NODES = os.path.join(ROOT, "data", "node_py_data.txt")
+BUNDLED_EDGES = os.path.join(ROOT, "data", "edge_py_data.txt")
+MAP_IMAGE = os.path.join(ROOT, "data", "map_image.png")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEAT = 5
+# 固定的训练量，使不同规模、不同提交之间的 q_learning 计时可比
+BENCH_EPISODES = 200
+BENCH_MAX_STEPS = 500
+NEAREST_QUERIES = 100  # 每次计时调用 find_nearest_station 的次数
+CLOSEST_QUERIES = 1000  # 每次计时调用 _get_closest_node 的次数（大图按节点数缩减）
+CLOSEST_BUDGET = 2_000_000  # 查询次数 × 节点数的上限（保持与逐点扫描时期的结果可比）
+
+
+def measure(fn, repeat, setup=None, teardown=None):
+    """重复运行 fn，返回每次耗时（秒）；被测函数的打印输出被丢弃且不影响结果"""
+    times = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+            if teardown is not None:
+                teardown()
+    return times
+
+
+class Suite:
+    def __init__(self, repeat: int, seed: int):
+        self.repeat = repeat
+        self.seed = seed
+        self.results = []
+        self._app = None
+        self._canvas = None
+
+    def record(self, dataset, case, times, calls=1, **extra):
+        entry = {
+            "dataset": dataset["name"],
+            "nodes": dataset["nodes"],
+            "edges": dataset["edges"],
+            "case": case,
+            "repeat": len(times),
+            "calls": calls,
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "mean_s": statistics.fmean(times),
+            **extra,
+        }
+        self.results.append(entry)
+        print(f"  {case:<32} median {entry['median_s'] * 1000:10.2f} ms"
+              f"  min {entry['min_s'] * 1000:10.2f} ms  ({calls} 次调用)")
+
+    def canvas(self):
+        """共享的 MapCanvas（offscreen），首次使用时创建 QApplication"""
+        if self._canvas is None:
+            from PyQt5.QtWidgets import QApplication
+            from gui.map_canvas import MapCanvas
+            self._app = QApplication.instance() or QApplication([])
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                self._canvas = MapCanvas(MAP_IMAGE)
+        return self._canvas
+
+    def run_dataset(self, name, node_file, edge_file, station_ids=None):
+        rng = random.Random(self.seed)
+        nodes = read_node_data(node_file)
+        graph = read_edge_data(edge_file, nodes)
+        dataset = {"name": name, "nodes": len(nodes),
+                   "edges": sum(len(vs) for vs in graph.values())}
+        print(f"[{name}] {dataset['nodes']} 个节点，{dataset['edges']} 条有向边")
+        node_ids = sorted(graph)
+        start, goal = rng.sample(node_ids, 2)
+
+        self.record(dataset, "read_node_data", measure(lambda: read_node_data(node_file), self.repeat))
+        self.record(dataset, "read_edge_data",
+                    measure(lambda: read_edge_data(edge_file, nodes), self.repeat))
+
+        # 训练：固定轮次与步数上限，关闭提前停止，每次使用相同的随机种子
+        config = get_config().replace(episodes=BENCH_EPISODES, max_steps=BENCH_MAX_STEPS,
+                                      tolerance=0.0, patience=0)
+        trained = {}
+
+        def train_dict():
+            trained["Q"] = q_learning(graph, start, goal, config=config)
+
+        reseed = lambda: random.seed(self.seed)
+        self.record(dataset, "q_learning", measure(train_dict, self.repeat, setup=reseed),
+                    episodes=BENCH_EPISODES, max_steps=BENCH_MAX_STEPS)
+        csr = CSRGraph(graph)
+        self.record(dataset, "q_learning_csr",
+                    measure(lambda: q_learning_csr(csr, start, goal, config=config),
+                            self.repeat, setup=reseed),
+                    episodes=BENCH_EPISODES, max_steps=BENCH_MAX_STEPS)
+        Q = trained["Q"]
+        self.record(dataset, "extract_path",
+                    measure(lambda: extract_path(Q, start, goal, verbose=False), self.repeat))
+
+        # PathService（初始化不计时；1k 节点规模会构建全源最短路表）
+        service = PathService()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            service.initialize_data(node_file, edge_file)
+        if station_ids is not None:
+            service.station_ids = list(station_ids)
+        else:
+            service.station_ids = rng.sample(node_ids, 6)
+        queries = [rng.choice(node_ids) for _ in range(NEAREST_QUERIES)]
+
+        def nearest():
+            for node_id in queries:
+                service.find_nearest_station(node_id)
+
+        self.record(dataset, "PathService.find_nearest_station", measure(nearest, self.repeat),
+                    calls=NEAREST_QUERIES, all_pairs=service.all_pairs is not None)
+
+        xs = [x for x, _ in nodes.values()]
+        ys = [y for _, y in nodes.values()]
+        center = (rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys)))
+        self.record(dataset, "PathService.apply_penalty_area",
+                    measure(lambda: service.apply_penalty_area(center, radius=100, penalty_factor=50.0),
+                            self.repeat, teardown=service.reset_penalty),
+                    radius=100)
+
+        from PyQt5.QtCore import QPointF
+        canvas = self.canvas()
+        canvas.path_service = service
+        n_points = max(10, min(CLOSEST_QUERIES, CLOSEST_BUDGET // len(nodes)))
+        points = [QPointF(rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys)))
+                  for _ in range(n_points)]
+
+        def closest():
+            for point in points:
+                canvas._get_closest_node(point)
+
+        self.record(dataset, "MapCanvas._get_closest_node", measure(closest, self.repeat),
+                    calls=n_points)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no", "."],
+                               cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run(sizes, repeat, seed, output=None, bundled=True, topology="grid"):
+    suite = Suite(repeat, seed)
+    if bundled:
+        suite.run_dataset("bundled", BUNDLED_NODES, BUNDLED_EDGES,
+                          station_ids=PathService().station_ids)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            network = generate_network(tmp, size, topology, seed=seed)
+            suite.run_dataset(f"{topology}_{size}", network["node_file"], network["edge_file"],
+                              station_ids=network["station_ids"])
+
+    commit, dirty = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "sizes": list(sizes),
+            "topology": topology,
+        },
+        "results": suite.results,
+    }
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"bench_{commit or 'unknown'}_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已写入 {output}")
+    return report
+
+
+def compare(old_file, new_file, threshold=1.10) -> int:
+    """按 (数据集, 用例) 比较两份结果的中位数耗时；返回变慢超过阈值的用例数"""
+    with open(old_file, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_file, encoding="utf-8") as f:
+        new = json.load(f)
+    old_results = {(r["dataset"], r["case"]): r for r in old["results"]}
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    regressions = 0
+    for r in new["results"]:
+        base = old_results.get((r["dataset"], r["case"]))
+        if base is None:
+            continue
+        ratio = r["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  <- 变慢"
+            regressions += 1
+        print(f"{r['dataset']:<12} {r['case']:<32} {base['median_s'] * 1000:10.2f} ms"
+              f" -> {r['median_s'] * 1000:10.2f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="路由与数据加载基准测试")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+                        help="合成路网的节点数")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个用例的重复次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="grid", help="合成路网的拓扑")
+    parser.add_argument("--no-bundled", action="store_true", help="跳过自带数据")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="比较两份结果 JSON，变慢的用例数作为退出码")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="比较时判定为变慢的耗时比例")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, threshold=args.threshold) else 0
+    run(args.sizes, max(1, args.repeat), args.seed, args.output, bundled=not args.no_bundled,
+        topology=args.topology)
+    return 0
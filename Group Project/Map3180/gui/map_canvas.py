@@ -11,33 +11,65 @@ from PyQt5.QtGui import (
 from PyQt5.QtWidgets import (
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem,
     QMessageBox, QGraphicsEllipseItem, QGraphicsLineItem,
-    QGraphicsPathItem,  QTextEdit            # 新增阴影效果
+    QGraphicsPathItem,  QTextEdit,           # 新增阴影效果
+    QProgressBar
 )
 from algorithms.path_service import PathService
-from math import atan2, degrees
+from algorithms.path_result import PathResult
+from gui import map_tiles
+from gui.pixmap_cache import PixmapCache, quantize
 
 var_special_mode_active = 0
 
 class PathSignals(QObject):
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(int, object)  # (请求编号, PathResult)
 
 class PathWorker(QRunnable):
-    def __init__(self, service: PathService, start_id: int, end_id: int):
+    def __init__(self, service: PathService, start_id: int, end_id: int, request_id: int,
+                 to_station: bool = False):
         super().__init__()
         self.signals = PathSignals()
         self.service = service
         self.start_id = start_id
         self.end_id = end_id
+        self.request_id = request_id
+        self.to_station = to_station  # 终点是最近充电站（查表得到路径）
         self.path_coords = []
 
     def run(self) -> None:
-        """执行路径计算任务"""
-        self.path_coords = self.service.calculate_path(self.start_id, self.end_id)
-        self.signals.finished.emit(self.path_coords)
+        """执行路径计算任务（被新请求取代时 calculate_path 返回 None，不发出结果）"""
+        result = self.service.calculate_path(self.start_id, self.end_id,
+                                             request_id=self.request_id,
+                                             to_station=self.to_station)
+        if result is None:
+            return
+        self.path_coords = result
+        self.signals.finished.emit(self.request_id, result)
 
     def get_path_coords(self) -> list:
         return self.path_coords
 
+class WarmSignals(QObject):
+    finished = pyqtSignal(int)  # 预热的终点数
+    failed = pyqtSignal(str)
+
+class WarmWorker(QRunnable):
+    """在线程池中运行 PathService.warm_all（内部再用进程池），避免冻结界面"""
+    def __init__(self, service: PathService, solver: str = None, max_workers: int = None):
+        super().__init__()
+        self.signals = WarmSignals()
+        self.service = service
+        self.solver = solver
+        self.max_workers = max_workers
+
+    def run(self) -> None:
+        try:
+            count = self.service.warm_all(self.solver, self.max_workers)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(count)
+
 
 class MapCanvas(QGraphicsView):
     def __init__(self, map_path: str):
@@ -45,29 +77,38 @@ class MapCanvas(QGraphicsView):
         # 初始化场景和地图
         self.scene = QGraphicsScene()
         self.setScene(self.scene)
-        self.map_pixmap = QGraphicsPixmapItem(QPixmap(map_path))
-        self.scene.addItem(self.map_pixmap)
+        # 底图按缩放级别分块加载（瓦片金字塔缓存在 data/cache/ 下）
+        self.map_layer = map_tiles.TileLayer(map_tiles.load_or_build(map_path))
+        self.scene.addItem(self.map_layer)
 
         self.info_panel = None
+        # 图标只加载一次，缩放/半透明后的结果由 PixmapCache 缓存
+        self.icons = PixmapCache()
+        self.icons.register("crash", "data/car_crash.png")
+        self.icons.register("rain", "data/rain_cloud.png")  # 使用半透明积雨云图片
+        self.icons.register("gas", "data/charge_station.png")
+        self.icons.register("start", "data/start_arrow.png")
+        self.icons.register("end", "data/end_arrow.png")
+        self.icons.register("hover", "data/hover_arrow.png")
+
         # 初始化车祸标记
-        self.accident_icon = QPixmap("data/car_crash.png")  # 确保图片路径正确
-        self.accident_marker = None 
-        
+        self.accident_marker = None  # 车祸模式下跟随鼠标的预览标记
+
         # 初始化暴雨标记
-        self.rain_icon = QPixmap("data/rain_cloud.png")  # 使用半透明积雨云图片
         self.rain_marker = None
         self.temp_marker = None  # 新增临时标记
         self.current_rain_radius = 100  # 默认影响半径
         self.current_penalty_factor = 50.0  # 默认惩罚系数
         self.is_rain_active = False
+        self.incident_markers = {}  # 暴雨/车祸标记 -> PathService 返回的事件句柄，右键标记可单独移除
 
         # 初始化充电站图标/id
-        self.gas_icon = QPixmap("data/charge_station.png").scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.gas_icon = self.icons.get("gas", 64)
         self.gas_station_ids = [4, 23, 11, 46, 32, 52]
          # 新增箭头图标初始化
-        self.start_icon = QPixmap("data/start_arrow.png").scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.end_icon = QPixmap("data/end_arrow.png").scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.hover_icon = QPixmap("data/hover_arrow.png").scaled(64, 64, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.start_icon = self.icons.get("start", 64)
+        self.end_icon = self.icons.get("end", 64)
+        self.hover_icon = self.icons.get("hover", 64, opacity=128)  # 50%透明度
         # 新增标记对象
         self.hover_marker = None  # 鼠标悬停临时标记
         self.start_marker = None  # 正式起点标记
@@ -79,7 +120,28 @@ class MapCanvas(QGraphicsView):
         self.animation_timer.timeout.connect(self._update_animation)
         
 
-        # 初始化路径服务
+        # 训练进度条（叠加在视图左上角，仅在 Q-learning 训练期间显示）
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setFixedWidth(520)
+        self.progress_bar.move(10, 10)
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                background-color: rgba(255, 255, 255, 200);
+                border: 1px solid #2196F3;
+                border-radius: 6px;
+                font-family: 'Microsoft YaHei';
+                font-size: 14px;
+                text-align: center;
+            }
+            QProgressBar::chunk {
+                background-color: rgba(33, 150, 243, 160);
+                border-radius: 6px;
+            }
+        """)
+        self.progress_bar.hide()
+
+        # 初始化路径服务（setter 负责连接信号槽）
+        self._path_service = None
         self.path_service = PathService()
         self.thread_pool = QThreadPool.globalInstance()
 
@@ -91,16 +153,30 @@ class MapCanvas(QGraphicsView):
         self.highlighted_node = None
         self.highlighted_marker = None
         self.path_completed = False  # 新增标志位
-
-        # 连接信号槽
-        self.path_service.calculation_failed.connect(self._show_error)
-        self.path_service.path_calculated.connect(self._draw_path)
+        self._request_id = None  # 最新路径请求的编号，其他请求的结果会被丢弃
 
         # 设置交互属性
         self.setMouseTracking(True)
         self.setDragMode(QGraphicsView.ScrollHandDrag)
         print("MapCanvas initialized!")
 
+    @property
+    def path_service(self) -> PathService:
+        return self._path_service
+
+    @path_service.setter
+    def path_service(self, service: PathService):
+        """更换路径服务时把信号槽改接到新实例（MainWindow 会注入共享的 PathService）"""
+        if self._path_service is not None:
+            self._path_service.calculation_failed.disconnect(self._show_error)
+            self._path_service.training_progress.disconnect(self._on_training_progress)
+            self._path_service.warm_progress.disconnect(self._on_warm_progress)
+        self._path_service = service
+        # 路径结果由 PathWorker 的 finished 信号绘制，这里不再连接 path_calculated
+        service.calculation_failed.connect(self._show_error)
+        service.training_progress.connect(self._on_training_progress)
+        service.warm_progress.connect(self._on_warm_progress)
+
     def set_info_panel(self, panel: QTextEdit):
         """设置右侧信息面板"""
         self.info_panel = panel
@@ -109,6 +185,9 @@ class MapCanvas(QGraphicsView):
     def mousePressEvent(self, event) -> None:
         global var_special_mode_active
 
+        # 右键点击暴雨/车祸标记：只移除这一个事件
+        if event.button() == Qt.RightButton and self._remove_incident_at(event.pos()):
+            return
         # 如果路径已完成且不在特殊模式下，忽略点击
         if self.path_completed and var_special_mode_active == 0:
             return
@@ -132,20 +211,9 @@ class MapCanvas(QGraphicsView):
         elif var_special_mode_active == 1 and event.button() == Qt.LeftButton:
             scene_pos = self.mapToScene(event.pos())
             
-            # 创建正式标记
-            scaled_icon = self.rain_icon.scaled(
-                int(self.current_rain_radius * 2),
-                int(self.current_rain_radius * 2),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            
-            # 应用透明度
-            painter = QPainter(scaled_icon)
-            painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
-            painter.fillRect(scaled_icon.rect(), QColor(0, 0, 0, 150))
-            painter.end()
-            
+            # 创建正式标记（与预览相同尺寸，直接取缓存）
+            scaled_icon = self._rain_pixmap()
+
             # 添加正式标记
             self.rain_marker = QGraphicsPixmapItem(scaled_icon)
             self.rain_marker.setOffset(-scaled_icon.width()/2, -scaled_icon.height()/2)
@@ -153,11 +221,13 @@ class MapCanvas(QGraphicsView):
             self.scene.addItem(self.rain_marker)
             
             # 应用最终参数
-            self.path_service.apply_penalty_area(
+            incident = self.path_service.apply_penalty_area(
                 (scene_pos.x(), scene_pos.y()),
                 radius=self.current_rain_radius,
-                penalty_factor=self.current_penalty_factor
+                penalty_factor=self.current_penalty_factor,
+                kind="rainstorm"
             )
+            self.incident_markers[self.rain_marker] = incident
             
             # 退出特殊模式并重置
             var_special_mode_active = 0
@@ -177,24 +247,18 @@ class MapCanvas(QGraphicsView):
         elif var_special_mode_active == 2:
             scene_pos = self.mapToScene(event.pos())
 
-            # 创建高可见度车祸标记
-            scaled_icon = self.accident_icon.scaled(150, 150,
-                                                    Qt.AspectRatioMode.KeepAspectRatio,
-                                                    Qt.SmoothTransformation
-                                                    )
-
-            # 添加标记到场景（无需透明）
-            self.accident_marker = QGraphicsPixmapItem(scaled_icon)
-            self.accident_marker.setOffset(-scaled_icon.width() / 2, -scaled_icon.height() / 2)
-            self.accident_marker.setPos(scene_pos)
-            self.scene.addItem(self.accident_marker)
+            # 预览标记直接成为正式的高可见度车祸标记（无需透明）
+            marker = self._place_marker(self.accident_marker, self.icons.get("crash", 150), scene_pos)
+            self.accident_marker = None  # 下次进入车祸模式时重新创建预览，不移动已放置的标记
 
             # 应用强路径惩罚（完全避让）
-            self.path_service.apply_penalty_area(
+            incident = self.path_service.apply_penalty_area(
                 (scene_pos.x(), scene_pos.y()),
                 radius=25,
-                penalty_factor=1000.0
+                penalty_factor=1000.0,
+                kind="crash"
             )
+            self.incident_markers[marker] = incident
             var_special_mode_active = 0  # 退出特殊模式
 
     def mouseMoveEvent(self, event):
@@ -216,54 +280,13 @@ class MapCanvas(QGraphicsView):
 
         # 暴雨模式移动效果
         if var_special_mode_active == 1:
-            self._clear_temp_markers()
+            # 临时标记只移动位置；半径变化时才换成缓存中另一尺寸的图标
             scene_pos = self.mapToScene(event.pos())
-            
-            if self.temp_marker:
-                self.scene.removeItem(self.temp_marker)
-            
-            # 创建新尺寸图标
-            scaled_icon = self.rain_icon.scaled(
-                int(self.current_rain_radius * 2),
-                int(self.current_rain_radius * 2),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            
-            # 应用透明度
-            painter = QPainter(scaled_icon)
-            painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
-            painter.fillRect(scaled_icon.rect(), QColor(0, 0, 0, 150))
-            painter.end()
-            
-            # 创建新临时标记
-            self.temp_marker = QGraphicsPixmapItem(scaled_icon)
-            self.temp_marker.setOffset(-scaled_icon.width()/2, -scaled_icon.height()/2)
-            self.temp_marker.setPos(scene_pos)
-            self.scene.addItem(self.temp_marker)
-        
+            self.temp_marker = self._place_marker(self.temp_marker, self._rain_pixmap(), scene_pos)
+
         elif var_special_mode_active == 2:
             scene_pos = self.mapToScene(event.pos())
-            x, y = scene_pos.x(), scene_pos.y()
-
-            # 清除旧标记
-            if self.accident_marker:
-                self.scene.removeItem(self.accident_marker)
-
-            # 创建新标记
-            scaled_icon = self.accident_icon.scaled(
-                150, 150, 
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            
-            self.accident_marker = QGraphicsPixmapItem(scaled_icon)
-            self.accident_marker.setOffset(
-                -scaled_icon.width() / 2, 
-                -scaled_icon.height() / 2
-            )
-            self.accident_marker.setPos(x, y)
-            self.scene.addItem(self.accident_marker)
+            self.accident_marker = self._place_marker(self.accident_marker, self.icons.get("crash", 150), scene_pos)
 
         elif var_special_mode_active == 3:
 
@@ -307,7 +330,8 @@ class MapCanvas(QGraphicsView):
             scale_factor = 1.1 if delta > 0 else 0.9
             
             # 更新参数（限制范围）
-            self.current_rain_radius = max(50, min(300, int(self.current_rain_radius * scale_factor)))
+            # 半径按 RADIUS_STEP 取整，图标尺寸只有有限几种，都能命中缓存
+            self.current_rain_radius = max(50, min(300, quantize(self.current_rain_radius * scale_factor)))
             self.current_penalty_factor = max(10.0, min(200.0, self.current_penalty_factor * scale_factor))
             
             # 强制刷新临时标记
@@ -330,26 +354,33 @@ class MapCanvas(QGraphicsView):
             # 移除旧标记
             self.scene.removeItem(self.rain_marker)
             
-            # 创建新尺寸图标
-            scaled_icon = self.rain_icon.scaled(
-                int(self.current_rain_radius * 2),  # 直径=半径*2
-                int(self.current_rain_radius * 2),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            
-            # 应用透明度
-            painter = QPainter(scaled_icon)
-            painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
-            painter.fillRect(scaled_icon.rect(), QColor(0, 0, 0, 150))
-            painter.end()
-            
+            # 新尺寸图标
+            scaled_icon = self._rain_pixmap()
+
             # 重新创建标记
             self.rain_marker = QGraphicsPixmapItem(scaled_icon)
             self.rain_marker.setOffset(-scaled_icon.width()/2, -scaled_icon.height()/2)
             self.rain_marker.setPos(self.rain_marker.pos())  # 保持原位置
             self.scene.addItem(self.rain_marker)
     
+    def _rain_pixmap(self) -> QPixmap:
+        """当前半径对应的半透明积雨云图标（直径=半径*2）"""
+        return self.icons.get("rain", quantize(self.current_rain_radius) * 2, opacity=150)
+
+    def _place_marker(self, marker, pixmap: QPixmap, pos: QPointF) -> QGraphicsPixmapItem:
+        """
+        把居中的图标标记移动到 pos：复用已在场景中的标记，图标不同时才替换 pixmap；
+        marker 为 None 或已被清出场景时新建一个
+        """
+        if marker is None or marker.scene() is not self.scene:
+            marker = QGraphicsPixmapItem()
+            self.scene.addItem(marker)
+        if marker.pixmap().cacheKey() != pixmap.cacheKey():
+            marker.setPixmap(pixmap)
+            marker.setOffset(-pixmap.width() / 2, -pixmap.height() / 2)
+        marker.setPos(pos)
+        return marker
+
     # ----------- 画节点 ---------------------- #
     def _draw_highlighted_node(self, node_id: int):
         """替换原有高亮逻辑为箭头图标"""
@@ -360,13 +391,9 @@ class MapCanvas(QGraphicsView):
         # 获取节点坐标
         x, y = self.path_service.nodes[node_id]
         
-        # 创建半透明悬停标记
-        transparent_icon = self.hover_icon.copy()
-        painter = QPainter(transparent_icon)
-        painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
-        painter.fillRect(transparent_icon.rect(), QColor(0,0,0,128))  # 50%透明度
-        painter.end()
-        
+        # 半透明悬停图标在初始化时已处理好
+        transparent_icon = self.hover_icon
+
         # 添加新标记
         self.hover_marker = QGraphicsPixmapItem(transparent_icon)
         self.hover_marker.setOffset(-transparent_icon.width()/2, -transparent_icon.height())  # 居中显示
@@ -390,10 +417,12 @@ class MapCanvas(QGraphicsView):
         print(f"起点选择: 节点{node_id} @ ({pos.x():.1f}, {pos.y():.1f})")
     
     # -------------------- 路径计算相关 --------------------
-    def _start_calculation(self) -> list:
+    def _start_calculation(self, to_station: bool = False) -> list:
         """启动后台计算任务"""
         self.set_loading_state(True)
-        worker = PathWorker(self.path_service, self.start_id, self.end_id)
+        self._request_id = self.path_service.next_request()  # 同时取消旧请求
+        worker = PathWorker(self.path_service, self.start_id, self.end_id, self._request_id,
+                            to_station)
 
         worker.signals.finished.connect(self._on_path_calculated)  # 正确连接信号
         self.thread_pool.start(worker)
@@ -419,14 +448,54 @@ class MapCanvas(QGraphicsView):
 
 
         print(f"终点选择: 节点{node_id} @ ({pos.x():.1f}, {pos.y():.1f})")
-        self.path_lines = self._start_calculation()
+        self.path_lines = self._start_calculation(to_station=mode)
         self.path_completed = True  # 设置路径完成标志
 
-    def _on_path_calculated(self, path_coords: list):
+    def _on_training_progress(self, request_id: int, episode: int, total: int, steps: int,
+                              elapsed: float, max_delta: float, path_length: int):
+        """刷新训练进度条和收敛读数"""
+        if request_id != self._request_id:
+            return  # 已被新请求取代或已重置：忽略旧任务仍在队列中的报告
+        route = f"route {path_length} segments" if path_length >= 0 else "no route yet"
+        self.progress_bar.setMaximum(max(1, total))
+        self.progress_bar.setValue(min(episode, total))
+        self.progress_bar.setFormat(
+            f"Training %v/%m  |ΔQ| {max_delta:.2e}  {route}  {elapsed:.1f}s")
+        self.progress_bar.show()
+
+    def start_warm(self, solver: str = None, max_workers: int = None):
+        """预热模式：在后台为所有终点预计算路由策略，完成后的查询都是查表"""
+        worker = WarmWorker(self.path_service, solver, max_workers)
+        worker.signals.finished.connect(self._on_warm_finished)
+        worker.signals.failed.connect(self._on_warm_failed)
+        self.thread_pool.start(worker)
+        if self.info_panel:
+            self.info_panel.append("⏳ Precomputing routes for all destinations...")
+
+    def _on_warm_progress(self, done: int, total: int):
+        self.progress_bar.setMaximum(max(1, total))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat("Precomputing routes %v/%m")
+        self.progress_bar.show()
+
+    def _on_warm_finished(self, count: int):
+        self.progress_bar.hide()
+        if self.info_panel:
+            self.info_panel.append(f"✅ Routes ready for {count} destinations")
+
+    def _on_warm_failed(self, msg: str):
+        self.progress_bar.hide()
+        QMessageBox.warning(self, "Precomputation Error", f"Details:\n{msg}")
+
+    def _on_path_calculated(self, request_id: int, result: PathResult):
         """处理计算结果"""
+        if request_id != self._request_id:
+            print(f"丢弃过期的路径结果（请求 {request_id}）")
+            return
+        self.progress_bar.hide()
         self.set_loading_state(False)
-        self._draw_path(path_coords)
-        print(f"Path: {path_coords}")
+        self._draw_path(result)
+        print(f"Path: {result.coords}")
 
     # -------------------- 图形绘制方法 --------------------
     def _draw_node_marker(self, node_id: int, color: Qt.GlobalColor) -> None:
@@ -439,13 +508,14 @@ class MapCanvas(QGraphicsView):
         marker.setBrush(QBrush(color))
         self.scene.addItem(marker)
 
-    def _draw_path(self, path_coords: list):
-        """路径绘制函数（带完善的自然语言导航）"""
+    def _draw_path(self, result: PathResult):
+        """路径绘制函数（带完善的自然语言导航，逐段长度和方向取自 PathResult）"""
         # 清除旧路径元素
         for item in self.path_lines:
             self.scene.removeItem(item)
         self.path_lines = []
         self.animation_offset = 0
+        path_coords = result.coords
 
         # 绘制路径（原有代码保留）
         if len(path_coords) >= 2:
@@ -466,12 +536,7 @@ class MapCanvas(QGraphicsView):
             self.animation_timer.start(50)
 
         # 生成导航指引
-        if self.info_panel and self.path_service and len(path_coords) >= 2:
-            directions = []
-            current_dir = None
-            current_length = 0.0
-            total_length = 0.0
-
+        if self.info_panel and len(path_coords) >= 2:
             # 方向箭头映射表
             DIRECTION_ARROWS = {
                 "north": "↑",
@@ -485,38 +550,12 @@ class MapCanvas(QGraphicsView):
                 "ahead": "▲"
             }
 
-            # 直接处理所有路径段（包含起点到第一个节点）
-            for i in range(len(path_coords)-1):
-                start = path_coords[i]
-                end = path_coords[i+1]
-                
-                # 获取实际路径长度（千米单位）
-                segment_length = self._get_segment_length(start, end)
-                
-                # 计算方向
-                direction = self._get_direction(start, end)
-                print(f"Segment Length: {segment_length:.3f} km. Direction: {direction}")
-
-                # 格式化方向显示
+            # 连续相同方向的路段已由 PathResult.legs 合并
+            directions = []
+            for direction, length in result.legs():
                 arrow = DIRECTION_ARROWS.get(direction.lower(), "➤")
                 colored_dir = f'<font color="red">{direction.capitalize()}</font> {arrow}'
-                
-                # 合并连续相同方向
-                if direction == current_dir:
-                    current_length += segment_length
-                    directions[-1] = f"{colored_dir} for {current_length:.3f}km"
-
-                else:                
-                    # 方向不相同    
-                    current_dir = direction
-                    current_length = segment_length
-                    if current_dir is not None:
-                        directions.append(f"{colored_dir} for {current_length:.3f}km")
-                    else:# 第一次方向
-                        directions.append(f"{colored_dir} for {segment_length:.3f}km")
-                    current_dir = direction
-                    
-                total_length += segment_length
+                directions.append(f"{colored_dir} for {length:.3f}km")
 
             print(directions)
 
@@ -532,55 +571,13 @@ class MapCanvas(QGraphicsView):
 
             # 添加统计信息
             instruction_html += f"<br><br><b>📊 Journey Summary:</b>"
-            instruction_html += f"<br>• Total distance: {total_length:.2f}km"
+            instruction_html += f"<br>• Total distance: {result.total_length:.2f}km"
             instruction_html += f"<br>• Number of segments: {len(directions)}"
 
             self.info_panel.setHtml(instruction_html)
 
         self.set_loading_state(False)
 
-    def _get_segment_length(self, start, end):
-        """获取实际路径长度（千米单位）"""
-        # 查找最近节点
-        start_node = min(self.path_service.nodes.items(), 
-                        key=lambda item: (item[1][0]-start[0])**2 + (item[1][1]-start[1])**2)
-        end_node = min(self.path_service.nodes.items(),
-                    key=lambda item: (item[1][0]-end[0])**2 + (item[1][1]-end[1])**2)
-        
-        # 从图数据获取实际长度（单位：千米）
-        return self.path_service.graph[start_node[0]].get(end_node[0], 0.0)
-
-    def _get_direction(self, start, end):
-        """Calculate direction with precise node coordinates"""
-        dx = end[0] - start[0]
-        dy = start[1] - end[1]  # Inverted y-axis
-        
-        # Handle straight directions
-        if dx == 0:
-            return "north" if dy > 0 else "south"
-        if dy == 0:
-            return "east" if dx > 0 else "west"
-        
-        angle = degrees(atan2(dy, dx))
-        
-        # Detailed direction thresholds
-        if -12.5 <= angle < 12.5:
-            return "east"
-        elif 12.5 <= angle < 77.5:
-            return "northeast"
-        elif 77.5 <= angle < 102.5:
-            return "north"
-        elif 102.5 <= angle < 167.5:
-            return "northwest"
-        elif angle >= 167.5 or angle < -167.5:
-            return "west"
-        elif -167.5 <= angle < -102.5:
-            return "southwest"
-        elif -102.5 <= angle < -77.5:
-            return "south"
-        elif -77.5 <= angle < -12.5:
-            return "southeast"
-
     def _update_animation(self):
         """更新动画帧"""
         # 虚线流动
@@ -593,15 +590,22 @@ class MapCanvas(QGraphicsView):
 
     # -------------------- 辅助方法 --------------------
     def _get_closest_node(self, pos: QPointF) -> int | None:
-        """获取最近节点ID（带阈值检测）"""
-        min_dist = float('inf')
-        closest_id = None
-        for node_id, (x, y) in self.path_service.nodes.items():
-            dist = (pos.x() - x) ** 2 + (pos.y() - y) ** 2
-            if dist < min_dist and dist < 2500:  # 50像素阈值
-                min_dist = dist
-                closest_id = node_id
-        return closest_id
+        """获取最近节点ID（带阈值检测，基于 PathService 的节点空间索引）"""
+        return self.path_service.nearest_node((pos.x(), pos.y()), max_distance=50)  # 50像素阈值
+
+    def _remove_incident_at(self, view_pos) -> bool:
+        """移除视图坐标处的暴雨/车祸标记及其对应的事件"""
+        for item in self.items(view_pos):
+            if item in self.incident_markers:
+                incident = self.incident_markers.pop(item)
+                self.scene.removeItem(item)
+                if incident is not None:
+                    self.path_service.remove_incident(incident)
+                if self.info_panel:
+                    kind = incident.kind if incident is not None else "incident"
+                    self.info_panel.append(f"🧹 {kind.capitalize()} is removed")
+                return True
+        return False
 
     def set_loading_state(self, loading: bool) -> None:
         """更新加载状态"""
@@ -611,6 +615,7 @@ class MapCanvas(QGraphicsView):
     def _show_error(self, msg: str) -> None:
         """显示错误信息"""
         self.set_loading_state(False)
+        self.progress_bar.hide()
         QMessageBox.critical(self, "Calculation Error", f"Details:\n{msg}")
         self.reset_selection()
 
@@ -648,6 +653,11 @@ class MapCanvas(QGraphicsView):
 
         # 停止动画
         self.animation_timer.stop()
+        self.progress_bar.hide()
+
+        # 取消仍在计算的路径请求，之后到达的旧结果一律丢弃
+        self._request_id = None
+        self.path_service.cancel_pending()
 
         """重置时清除所有箭头标记"""
         # 新增清除起点、终点箭头逻辑
@@ -662,9 +672,7 @@ class MapCanvas(QGraphicsView):
         for item in self.scene.items():
             if isinstance(item, (QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsPixmapItem)):
                 self.scene.removeItem(item)
-        # 保留底图
-        if not any(isinstance(item, QGraphicsPixmapItem) for item in self.scene.items()):
-            self.scene.addItem(self.map_pixmap)
+        # 底图是 TileLayer，不在上面的清除范围内
         # 清除路径线条列表
         self.path_lines = []
 
@@ -673,6 +681,7 @@ class MapCanvas(QGraphicsView):
             self.info_panel.clear()
 
         self.path_service.reset_penalty()
+        self.incident_markers.clear()
         self.station_markers_shown = False
 
     def add_simulated_carcrash(self):
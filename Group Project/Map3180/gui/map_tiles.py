@@ -0,0 +1,294 @@
+# gui/map_tiles.py
+"""
+多分辨率地图瓦片：
+    TilePyramid：把地图大图切成固定大小的瓦片，每升一级宽高减半，直到整幅图只剩一块。
+                 瓦片 PNG 和清单（manifest.json）缓存在数据文件旁的 cache/ 目录中，源图不变时直接复用。
+    TileLayer：场景中的底图图元。只为当前缩放级别下可见的瓦片在后台线程读盘解码，
+               解码后的瓦片按 LRU 淘汰；瓦片到达之前用常驻的最粗一级顶替。
+场景坐标始终是原图的像素坐标，节点坐标和各种标记的位置都不受影响。
+
+预生成：python -m gui.map_tiles data/map_image.png
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QRectF, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QPainter
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsObject
+
+from algorithms.all_pairs import file_digest
+
+TILE_SIZE = 256
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class TilePyramid:
+    """
+    磁盘上的瓦片金字塔。第 0 级是原图，第 k 级的宽高约为原图的 1/2^k；
+    第 level 级第 row 行第 col 列的瓦片保存在 <directory>/<level>/<col>_<row>.png。
+    """
+
+    def __init__(self, directory: str, width: int, height: int, tile_size: int, levels: list):
+        """
+        :param levels: 每一级的像素尺寸 [(宽, 高), ...]，第 0 级与原图相同
+        """
+        self.directory = directory
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.levels = [tuple(size) for size in levels]
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.levels)
+
+    def grid(self, level: int) -> tuple:
+        """该级的 (列数, 行数)"""
+        w, h = self.levels[level]
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def scale(self, level: int) -> tuple:
+        """该级一个像素对应的场景（原图）像素数 (sx, sy)"""
+        w, h = self.levels[level]
+        return self.width / w, self.height / h
+
+    def tile_path(self, level: int, col: int, row: int) -> str:
+        return os.path.join(self.directory, str(level), f"{col}_{row}.png")
+
+    def tile_rect(self, level: int, col: int, row: int) -> QRectF:
+        """瓦片覆盖的场景矩形"""
+        w, h = self.levels[level]
+        sx, sy = self.scale(level)
+        x, y = col * self.tile_size, row * self.tile_size
+        return QRectF(x * sx, y * sy, min(self.tile_size, w - x) * sx, min(self.tile_size, h - y) * sy)
+
+    def level_for(self, lod: float) -> int:
+        """
+        缩放比例 lod（屏幕像素 / 场景像素）下使用的级别：取分辨率仍不低于屏幕的最粗一级，
+        因此瓦片绘制时只会被缩小（不到 2 倍），不会被放大而变模糊。
+        """
+        if lod >= 1.0 or lod <= 0.0:
+            return 0
+        return min(int(math.log2(1.0 / lod)), self.num_levels - 1)
+
+    def tiles_in(self, level: int, rect: QRectF) -> list:
+        """与场景矩形 rect 相交的瓦片 [(level, col, row)]，按行优先"""
+        cols, rows = self.grid(level)
+        sx, sy = self.scale(level)
+        span = self.tile_size
+        c0 = max(int(rect.left() / sx // span), 0)
+        c1 = min(math.ceil(rect.right() / sx / span), cols)
+        r0 = max(int(rect.top() / sy // span), 0)
+        r1 = min(math.ceil(rect.bottom() / sy / span), rows)
+        return [(level, col, row) for row in range(r0, r1) for col in range(c0, c1)]
+
+    @classmethod
+    def build(cls, image_path: str, directory: str, tile_size: int = TILE_SIZE, sources: dict = None,
+              digest: str = None):
+        """
+        切图并写入 directory（原有内容会被清空）。清单最后写入，
+        因此中途失败留下的目录不会被当作有效缓存。
+        """
+        image = QImage(image_path)
+        if image.isNull():
+            raise ValueError(f"无法读取地图图片：{image_path}")
+        shutil.rmtree(directory, ignore_errors=True)
+
+        width, height = image.width(), image.height()
+        levels = []
+        while True:
+            w, h = image.width(), image.height()
+            level = len(levels)
+            levels.append((w, h))
+            os.makedirs(os.path.join(directory, str(level)), exist_ok=True)
+            for row in range(math.ceil(h / tile_size)):
+                for col in range(math.ceil(w / tile_size)):
+                    x, y = col * tile_size, row * tile_size
+                    tile = image.copy(x, y, min(tile_size, w - x), min(tile_size, h - y))
+                    path = os.path.join(directory, str(level), f"{col}_{row}.png")
+                    if not tile.save(path, "PNG"):
+                        raise OSError(f"瓦片写入失败：{path}")
+            if w <= tile_size and h <= tile_size:
+                break
+            image = image.scaled(max((w + 1) // 2, 1), max((h + 1) // 2, 1),
+                                 Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "width": width,
+            "height": height,
+            "tile_size": tile_size,
+            "levels": levels,
+            "sources": sources or {},
+            "digest": digest,
+        }
+        tmp = os.path.join(directory, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(directory, MANIFEST))
+        return cls(directory, width, height, tile_size, levels)
+
+    @staticmethod
+    def read_manifest(directory: str):
+        """读取清单；不存在或损坏时返回 None"""
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("version") == FORMAT_VERSION else None
+
+    @classmethod
+    def from_manifest(cls, directory: str, manifest: dict):
+        return cls(directory, manifest["width"], manifest["height"],
+                   manifest["tile_size"], manifest["levels"])
+
+
+def cache_directory(cache_dir: str, image_path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(image_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"tiles_{key}")
+
+
+def load_or_build(image_path: str, cache_dir: str = None, tile_size: int = TILE_SIZE) -> TilePyramid:
+    """
+    复用新鲜的瓦片缓存；缺失、过期或瓦片尺寸不同时重新切图。
+    :param cache_dir: 缓存目录，默认是图片旁的 cache/ 目录；不可写时退回系统临时目录
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(image_path)), "cache")
+    directory = cache_directory(cache_dir, image_path)
+    st = os.stat(image_path)
+    sources = {os.path.abspath(image_path): [st.st_size, st.st_mtime_ns]}
+    manifest = TilePyramid.read_manifest(directory)
+
+    digest = None
+    if manifest is not None and manifest.get("tile_size") == tile_size:
+        try:
+            if manifest["sources"] == sources:
+                return TilePyramid.from_manifest(directory, manifest)
+            # 修改时间变了但内容可能没变（例如重新检出），按内容摘要判断
+            digest = file_digest(image_path)
+            if manifest["digest"] == digest:
+                manifest["sources"] = sources
+                with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f)
+                return TilePyramid.from_manifest(directory, manifest)
+        except (OSError, KeyError, TypeError) as e:
+            print(f"瓦片缓存读取失败，将重新切图：{e}")
+
+    digest = digest or file_digest(image_path)
+    try:
+        return TilePyramid.build(image_path, directory, tile_size, sources, digest)
+    except OSError as e:
+        print(f"瓦片缓存写入失败，改用临时目录：{e}")
+        return TilePyramid.build(image_path, tempfile.mkdtemp(prefix="map_tiles_"), tile_size)
+
+
+class TileSignals(QObject):
+    loaded = pyqtSignal(object, QImage)  # ((level, col, row), 解码后的瓦片；读取失败时为空图)
+
+
+class TileLoader(QRunnable):
+    """在线程池中读取并解码一块瓦片（QImage 可以在非 GUI 线程使用，QPixmap 不行）"""
+
+    def __init__(self, key: tuple, path: str):
+        super().__init__()
+        self.signals = TileSignals()
+        self.key = key
+        self.path = path
+
+    def run(self) -> None:
+        self.signals.loaded.emit(self.key, QImage(self.path))
+
+
+class TileLayer(QGraphicsObject):
+    """
+    底图图元，覆盖整幅原图的场景矩形。每次重绘只处理暴露区域内当前级别的瓦片：
+    已解码的直接绘制，其余交给后台线程读取，到达后只刷新该瓦片所在的矩形。
+    """
+
+    CAPACITY = 96  # 常驻的解码瓦片数上限（256×256 的瓦片约 256KB 一块）
+
+    def __init__(self, pyramid: TilePyramid, capacity: int = CAPACITY, parent=None):
+        super().__init__(parent)
+        self.pyramid = pyramid
+        self.capacity = capacity
+        self._tiles = OrderedDict()  # (level, col, row) -> QPixmap，最近使用的在末尾
+        self._pending = set()  # 已提交、尚未返回的瓦片
+        self._missing = set()  # 读取失败的瓦片，不再重复请求
+        self._level = None  # 上一次重绘使用的级别
+        self._visible = 0  # 上一次重绘可见的瓦片数，淘汰时至少保留这么多
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(2)  # 不占用路径计算所用的全局线程池
+        # 最粗一级只有一块，同步加载并常驻，作为瓦片到达前的占位
+        self._base = QPixmap(pyramid.tile_path(pyramid.num_levels - 1, 0, 0))
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setZValue(-1)
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.pyramid.width, self.pyramid.height)
+
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        level = self.pyramid.level_for(option.levelOfDetailFromTransform(painter.worldTransform()))
+        if level != self._level:
+            # 缩放级别变了：还没开始读取的旧级别瓦片不再需要
+            self.pool.clear()
+            self._pending.clear()
+            self._level = level
+
+        keys = self.pyramid.tiles_in(level, exposed)
+        self._visible = len(keys)
+        if any(key not in self._tiles for key in keys):
+            sx = self._base.width() / self.pyramid.width
+            sy = self._base.height() / self.pyramid.height
+            source = QRectF(exposed.x() * sx, exposed.y() * sy, exposed.width() * sx, exposed.height() * sy)
+            painter.drawPixmap(exposed, self._base, source)
+
+        for key in keys:
+            pixmap = self._tiles.get(key)
+            if pixmap is None:
+                self._request(key)
+                continue
+            self._tiles.move_to_end(key)
+            painter.drawPixmap(self.pyramid.tile_rect(*key), pixmap, QRectF(pixmap.rect()))
+
+    def _request(self, key: tuple):
+        if key in self._pending or key in self._missing:
+            return
+        self._pending.add(key)
+        loader = TileLoader(key, self.pyramid.tile_path(*key))
+        loader.signals.loaded.connect(self._on_tile_loaded)
+        self.pool.start(loader)
+
+    def _on_tile_loaded(self, key: tuple, image: QImage):
+        """在主线程中把瓦片转成 QPixmap 放入缓存，并只刷新它覆盖的区域"""
+        self._pending.discard(key)
+        if image.isNull():
+            print(f"瓦片读取失败：{self.pyramid.tile_path(*key)}")
+            self._missing.add(key)
+            return
+        self._tiles[key] = QPixmap.fromImage(image)
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > max(self.capacity, self._visible):
+            self._tiles.popitem(last=False)
+        self.update(self.pyramid.tile_rect(*key))
+
+    def cached_tiles(self) -> int:
+        return len(self._tiles)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("用法：python -m gui.map_tiles <地图图片> [缓存目录]")
+        sys.exit(2)
+    pyramid = load_or_build(*sys.argv[1:])
+    print(f"瓦片金字塔：{pyramid.width}×{pyramid.height}，{pyramid.num_levels} 级，"
+          f"目录 {pyramid.directory}")
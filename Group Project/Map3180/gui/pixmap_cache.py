@@ -0,0 +1,75 @@
+# gui/pixmap_cache.py
+"""
+标记图标缓存：同一图标的缩放和半透明处理只做一次。
+按 (图标名, 尺寸, 不透明度) 缓存处理好的 QPixmap，条目数有上限，超出时按 LRU 淘汰。
+暴雨半径按固定步长取整，滚轮调整半径时只会用到有限几种尺寸，移动鼠标只改标记位置，不再重新采样图片。
+"""
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QPainter, QColor
+
+RADIUS_STEP = 10  # 暴雨半径的取整步长（像素）
+
+
+def quantize(value: float, step: int = RADIUS_STEP) -> int:
+    """取整到 step 的整数倍（至少一个步长）"""
+    return max(int(round(value / step)) * step, step)
+
+
+class PixmapCache:
+    """
+        icons = PixmapCache()
+        icons.register("rain", "data/rain_cloud.png")
+        icons.get("rain", 200, opacity=150)   # 缩放到 200×200 以内、alpha 乘以 150/255
+    """
+
+    CAPACITY = 64  # 缓存的处理后图标数上限
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._sources = {}  # 图标名 -> 原始 QPixmap
+        self._entries = OrderedDict()  # (图标名, 尺寸, 不透明度) -> QPixmap，最近使用的在末尾
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, path: str):
+        """登记原始图片；同名图标重新登记时丢弃它已缓存的结果"""
+        self._sources[name] = QPixmap(path)
+        for key in [key for key in self._entries if key[0] == name]:
+            del self._entries[key]
+
+    def get(self, name: str, size: int = None, opacity: int = 255) -> QPixmap:
+        """
+        :param size: 等比缩放到 size×size 以内；None 表示原尺寸
+        :param opacity: 0~255，与图标原有的 alpha 相乘
+        """
+        key = (name, size, opacity)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return pixmap
+
+        self.misses += 1
+        pixmap = self._render(self._sources[name], size, opacity)
+        self._entries[key] = pixmap
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return pixmap
+
+    @staticmethod
+    def _render(source: QPixmap, size: int, opacity: int) -> QPixmap:
+        if size is None:
+            pixmap = source.copy()
+        else:
+            pixmap = source.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if opacity < 255:
+            painter = QPainter(pixmap)
+            painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
+            painter.fillRect(pixmap.rect(), QColor(0, 0, 0, opacity))
+            painter.end()
+        return pixmap
+
+    def __len__(self):
+        return len(self._entries)
@@ -76,6 +76,8 @@
 
 
 #"--------------------------------------------------------------"
+import argparse
+import multiprocessing
 import os
 import sys
 from PyQt5.QtWidgets import QApplication, QMessageBox
@@ -88,10 +90,22 @@ def resource_path(relative_path):
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(base_path, relative_path)
 
+def parse_args(argv):
+    """命令行选项；未识别的参数（Qt 自身的选项）原样留给 QApplication"""
+    parser = argparse.ArgumentParser(description="Map3180 navigation")
+    parser.add_argument("--warm", action="store_true",
+                        help="预热模式：进入地图后在后台为所有终点预计算路由策略")
+    parser.add_argument("--warm-solver", default=None,
+                        help="预热使用的求解器（默认与路径服务相同）")
+    parser.add_argument("--warm-workers", type=int, default=None,
+                        help="预热使用的进程数（默认 CPU 核数）")
+    return parser.parse_known_args(argv[1:])
+
 class AppManager:
     """统一管理应用程序状态"""
-    def __init__(self):
-        self.app = QApplication(sys.argv)
+    def __init__(self, options=None, qt_args=()):
+        self.options = options
+        self.app = QApplication([sys.argv[0], *qt_args])
         self.current_window = None
 
     def show_main_menu(self):
@@ -116,12 +130,18 @@ class AppManager:
             
             self.current_window = MainWindow(map_path, path_service)
             self.current_window.show()
+            if self.options is not None and self.options.warm:
+                self.current_window.map_canvas.start_warm(self.options.warm_solver,
+                                                          self.options.warm_workers)
 
         except Exception as e:
             QMessageBox.critical(None, "错误", f"初始化失败: {str(e)}")
 
 if __name__ == "__main__":
-    manager = AppManager()
+    # 打包后的程序用 spawn 启动预热进程池的工作进程，需要在入口处识别并直接进入工作进程
+    multiprocessing.freeze_support()
+    options, qt_args = parse_args(sys.argv)
+    manager = AppManager(options, qt_args)
     manager.show_main_menu()
     sys.exit(manager.app.exec_())
 